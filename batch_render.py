@@ -0,0 +1,148 @@
+"""
+Headless batch rendering of polymer failure criterion plots.
+
+Parameter sweeps are split into chunks and rendered to PNG/SVG files in a
+process pool. Workers draw on the Agg backend through matplotlib's
+object-oriented API, so no display or pyplot state is needed.
+
+Example
+-------
+    python batch_render.py --gamma1 0 1 2 3 4 --gamma2 0.02 0.2 0.5 \
+        --level 20 --output-dir plots --format svg --workers 8
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from level_set import marching_squares
+from polymer_failure import evaluate_failure_sweep, stretch_grid, stretch_invariants
+
+# Per-worker state, filled in once by _init_worker
+_GRID = {}
+
+
+def _init_worker(min_lambda, max_lambda, num_points):
+    """
+    Select the Agg backend and precompute the stretch invariants once per worker.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    L1, L2 = stretch_grid(min_lambda, max_lambda, num_points)
+    I1, I2 = stretch_invariants(L1, L2)
+    _GRID.update(lambdas=L1[0, :], I1=I1, I2=I2, min_lambda=min_lambda, max_lambda=max_lambda)
+
+
+def plot_file_name(gamma1, gamma2, level, fmt):
+    """
+    Return the file name used for one parameter set.
+    """
+    return f"failure_g1_{gamma1:g}_g2_{gamma2:g}_F{level:g}.{fmt}"
+
+
+def _render_chunk(params, output_dir, fmt, dpi):
+    """
+    Evaluate and render one chunk of (γ₁, γ₂, level) parameter sets.
+    """
+    from matplotlib.figure import Figure
+
+    gamma1, gamma2, levels = (np.array(p) for p in zip(*params))
+    lambdas = _GRID["lambdas"]
+    min_lambda, max_lambda = _GRID["min_lambda"], _GRID["max_lambda"]
+    values = evaluate_failure_sweep(_GRID["I1"], _GRID["I2"], gamma1, gamma2).values
+
+    guide = np.linspace(min_lambda, max_lambda, 100)
+    paths = []
+    for g1, g2, level, F in zip(gamma1, gamma2, levels, values):
+        fig = Figure(figsize=(10, 8))
+        ax = fig.add_subplot()
+        for line in marching_squares(lambdas, lambdas, F, level):
+            ax.plot(line[:, 0], line[:, 1], color="blue", linewidth=2)
+        ax.plot(guide, guide, "k--", label="λ₁=λ₂", linewidth=1.5)
+        ax.plot(guide, np.sqrt(1 / guide), "k:", label="λ₁λ₂²=1", linewidth=1.5)
+        ax.set_xlim(min_lambda, max_lambda)
+        ax.set_ylim(min_lambda, max_lambda)
+        ax.grid(True, linestyle="--", alpha=0.5)
+        ax.legend(loc="upper right")
+        ax.set_xlabel("λ₁", fontsize=12)
+        ax.set_ylabel("λ₂", fontsize=12)
+        ax.set_title(f"General Failure Criterion for Polymers (γ₁={g1:g}, γ₂={g2:g}, F={level:g})", fontsize=13)
+
+        path = os.path.join(output_dir, plot_file_name(g1, g2, level, fmt))
+        fig.savefig(path, format=fmt, dpi=dpi)
+        paths.append(path)
+    return paths
+
+
+def render_failure_sweep(params, output_dir, fmt="png", workers=None, chunk_size=16,
+                         min_lambda=0.2, max_lambda=5, num_points=400, dpi=100):
+    """
+    Render one failure criterion plot per (γ₁, γ₂, level) set to output_dir.
+
+    Parameters
+    ----------
+    params : iterable of tuple
+        (gamma1, gamma2, level) per plot.
+    output_dir : str
+        Directory for the image files; created if missing.
+    fmt : str, optional
+        "png" or "svg" (default "png").
+    workers : int, optional
+        Number of worker processes (default: os.cpu_count()).
+    chunk_size : int, optional
+        Parameter sets per task; each chunk is evaluated in one batched pass.
+    min_lambda, max_lambda, num_points : optional
+        λ grid, as in general_failure_criterion_for_polymers.
+    dpi : int, optional
+        Resolution of raster output.
+
+    Returns
+    -------
+    list of str
+        Paths of the written files, in the order of params.
+
+    Raises
+    ------
+    ValueError
+        If fmt is not supported.
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Unsupported format: {fmt} (expected png or svg)")
+    params = [tuple(float(v) for v in p) for p in params]
+    if not params:
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    chunks = [params[i:i + chunk_size] for i in range(0, len(params), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(min_lambda, max_lambda, num_points)) as pool:
+        results = pool.map(_render_chunk, chunks, itertools.repeat(output_dir),
+                           itertools.repeat(fmt), itertools.repeat(dpi))
+        return [path for paths in results for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render polymer failure criterion plots for a parameter sweep")
+    parser.add_argument("--gamma1", nargs="+", type=float, default=[0.0], help="γ₁ values to sweep")
+    parser.add_argument("--gamma2", nargs="+", type=float, default=[0.02], help="γ₂ values to sweep")
+    parser.add_argument("--level", nargs="+", type=float, default=[20.0], help="Failure levels F to draw")
+    parser.add_argument("--output-dir", default="failure_plots", help="Output directory (default: failure_plots)")
+    parser.add_argument("--format", choices=["png", "svg"], default="png", help="Image format (default: png)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--num-points", type=int, default=400, help="Grid points per λ axis (default: 400)")
+    parser.add_argument("--min-lambda", type=float, default=0.2, help="Smallest stretch (default: 0.2)")
+    parser.add_argument("--max-lambda", type=float, default=5.0, help="Largest stretch (default: 5)")
+    parser.add_argument("--dpi", type=int, default=100, help="Raster resolution (default: 100)")
+    args = parser.parse_args()
+
+    params = list(itertools.product(args.gamma1, args.gamma2, args.level))
+    paths = render_failure_sweep(params, args.output_dir, args.format, args.workers,
+                                 min_lambda=args.min_lambda, max_lambda=args.max_lambda,
+                                 num_points=args.num_points, dpi=args.dpi)
+    print(f"Rendered {len(paths)} plots to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from key_file_cleaner import (is_compressed_key_file, is_file_to_remove, is_key_file, process_compressed_file,
+                              process_file, remove_file)
+from frame_prefetch import DEFAULT_PREFETCH_BYTES, DEFAULT_PREFETCH_DEPTH, ReadAheadBudget
+from generate_video import IMAGE_EXTENSIONS, build_folder_video
+
+# Futures kept in flight per worker thread before the walk waits for results
+MAX_IN_FLIGHT_PER_WORKER = 4
+
+
+@dataclass
+class BatchReport:
+    """
+    Consolidated result of a batch run over one directory tree.
+    """
+    directories_scanned: int = 0
+    files_removed: int = 0
+    key_files_processed: int = 0
+    videos_created: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"Directories scanned: {self.directories_scanned}",
+            f"Files removed:       {self.files_removed}",
+            f"Key files cleaned:   {self.key_files_processed}",
+            f"Videos created:      {self.videos_created}",
+            f"Errors:              {len(self.errors)}",
+            f"Total time:          {self.elapsed_seconds:.1f} seconds ({self.elapsed_seconds/60:.1f} minutes)",
+        ]
+        lines.extend(f"  {path}: {message}" for path, message in self.errors)
+        return "\n".join(lines)
+
+
+def run_batch(directory: str, remove_d3p: bool = False, frame_rate: int = 30,
+              workers: Optional[int] = None, prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+              prefetch_bytes: int = DEFAULT_PREFETCH_BYTES) -> BatchReport:
+    """
+    Clean key files and generate videos in a single traversal of directory.
+
+    The tree is walked once. Junk files are removed, .key/.k files (also
+    gzip/xz/bzip2-compressed ones) are cleaned and leaf folders containing images are turned into videos, all
+    in one shared worker pool, so the I/O-bound cleaning overlaps with the
+    CPU-bound video encoding. At most MAX_IN_FLIGHT_PER_WORKER tasks per
+    worker are queued at a time, so memory stays bounded on large trees.
+
+    Parameters
+    ----------
+    directory : str
+        Root of the test/simulation tree.
+    remove_d3p : bool, optional
+        Whether d3plot files are removed as well.
+    frame_rate : int, optional
+        Frame rate of the generated videos.
+    workers : int, optional
+        Size of the worker pool (default: ThreadPoolExecutor's default).
+    prefetch_depth : int, optional
+        Frames read ahead per video folder.
+    prefetch_bytes : int, optional
+        Bytes read ahead in total, shared by all video folders in flight.
+
+    Returns
+    -------
+    BatchReport
+
+    Raises
+    ------
+    TypeError
+        If directory is None.
+    FileNotFoundError
+        If directory is not a valid directory.
+    """
+    if directory is None:
+        raise TypeError("directory is None")
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"directory {directory} is not a valid directory")
+
+    report = BatchReport()
+    start_time = time.time()
+    budget = ReadAheadBudget(prefetch_bytes)
+
+    def record(future: Future, kind: str, path: str) -> None:
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.error(f"Unhandled exception processing {path}: {str(e)}")
+            report.errors.append((path, str(e)))
+            return
+        if kind == "remove":
+            if result:
+                report.files_removed += 1
+                logging.info(f"Removed file: {path}, {report.files_removed}")
+            else:
+                report.errors.append((path, "failed to remove file"))
+        elif kind == "clean":
+            if result is None:
+                report.errors.append((path, "failed to process key file"))
+            else:
+                report.key_files_processed += 1
+        elif result is not None:
+            report.videos_created += 1
+            logging.info(f"Successfully processed folder: {path}")
+
+    if workers is None:
+        # ThreadPoolExecutor's default
+        workers = min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Bound the futures in flight so memory does not grow with the size of the tree;
+        # the walk pauses while the pool catches up and results are recorded as they finish
+        max_in_flight = MAX_IN_FLIGHT_PER_WORKER * workers
+        futures = {}
+
+        def submit(kind: str, path: str, fn, *args, **kwargs) -> None:
+            if len(futures) >= max_in_flight:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future, *futures.pop(future))
+            futures[pool.submit(fn, *args, **kwargs)] = (kind, path)
+
+        for root, dirs, files in os.walk(directory):
+            report.directories_scanned += 1
+            images = []
+            for file in files:
+                file_path = os.path.join(root, file)
+                if is_file_to_remove(file, remove_d3p):
+                    submit("remove", file_path, remove_file, file_path)
+                elif is_key_file(file):
+                    submit("clean", file_path, process_file, file_path)
+                elif is_compressed_key_file(file):
+                    submit("clean", file_path, process_compressed_file, file_path)
+                elif file.lower().endswith(IMAGE_EXTENSIONS):
+                    images.append(file)
+            # os.walk already listed the subdirectories, so leaf folders need no extra scan
+            if not dirs and images:
+                submit("video", root, build_folder_video, root, frame_rate, images,
+                       prefetch_depth=prefetch_depth, prefetch_budget=budget)
+
+        for future in as_completed(futures):
+            record(future, *futures[future])
+
+    report.elapsed_seconds = time.time() - start_time
+    return report
+
+
+def main(directory: Optional[str] = None, remove_d3p: Optional[bool] = None,
+         frame_rate: int = 30, workers: Optional[int] = None,
+         prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+         prefetch_bytes: int = DEFAULT_PREFETCH_BYTES) -> Optional[BatchReport]:
+    """
+    The main entry point for the batch runner.
+
+    Prompts for the directory and the d3plot choice when no directory is
+    given (otherwise d3plot files are kept unless remove_d3p is True), runs
+    the cleaner and the video generator in one traversal and prints the
+    consolidated report. Returns the report, or None if the run failed.
+    """
+    try:
+        print("Welcome to the Batch Runner (Key File Cleaner + Video Generator)")
+        interactive = directory is None
+        if interactive:
+            directory = input("Please enter the directory path to process (Enter for Current Directory): ").strip()
+        if remove_d3p is None:
+            remove_d3p = interactive and input("Remove d3plot files (y/n): ").strip().lower().startswith('y')
+
+        directory = os.path.abspath(directory) if directory else os.getcwd()
+        if not os.path.exists(directory):
+            raise FileNotFoundError(f"Directory does not exist: {directory}")
+        if not os.path.isdir(directory):
+            raise NotADirectoryError(f"Path is not a directory: {directory}")
+
+        report = run_batch(directory, remove_d3p, frame_rate, workers, prefetch_depth, prefetch_bytes)
+        print("\n" + report.summary())
+        return report
+    except (FileNotFoundError, NotADirectoryError) as e:
+        print(f"\nError: {str(e)}")
+        logging.error(str(e))
+    except Exception as e:
+        print(f"\nUnexpected error: {str(e)}")
+        logging.error(f"Unhandled exception: {str(e)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename='BatchRunner.log', filemode='a', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
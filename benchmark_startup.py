@@ -0,0 +1,86 @@
+"""
+Startup-time benchmark for the toolkit entry points.
+
+Each entry-point module is imported in a fresh interpreter with
+``-X importtime``. The script reports its cumulative import time and checks
+that heavy dependencies (cv2, numpy, matplotlib) are not loaded at import.
+It exits with status 1 if any module exceeds the import-time budget or
+pulls in a heavy dependency, so it can gate builds.
+
+Example
+-------
+    python benchmark_startup.py --budget-ms 50 --runs 5 --output bench_startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = ["main", "key_file_cleaner", "generate_video"]
+HEAVY_MODULES = ["cv2", "numpy", "matplotlib"]
+
+
+def measure_import(module, cwd):
+    """
+    Import module in a fresh interpreter and return (import_us, heavy_modules_loaded).
+    """
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=cwd, check=True)
+    import_us = None
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            import_us = int(parts[1].strip())
+    return import_us, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(modules, runs, budget_ms):
+    """
+    Measure every module and return a JSON-serialisable report.
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    report = {"python": sys.version.split()[0], "budget_ms": budget_ms, "modules": {}, "passed": True}
+    for module in modules:
+        samples = []
+        heavy = []
+        for _ in range(runs):
+            import_us, heavy = measure_import(module, cwd)
+            samples.append(import_us / 1000)
+        median_ms = statistics.median(samples)
+        passed = median_ms <= budget_ms and not heavy
+        report["modules"][module] = {
+            "median_ms": median_ms,
+            "samples_ms": samples,
+            "heavy_modules": heavy,
+            "passed": passed,
+        }
+        report["passed"] &= passed
+        status = "OK  " if passed else "FAIL"
+        extra = f" (loads {', '.join(heavy)})" if heavy else ""
+        print(f"{status} {module:<20} {median_ms:7.2f} ms{extra}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the toolkit entry points")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="Maximum median import time per module in milliseconds (default: 50)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (default: 5)")
+    parser.add_argument("--modules", nargs="+", default=ENTRY_POINTS, help="Modules to check")
+    parser.add_argument("--output", default=None, help="Optional JSON result file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.modules, args.runs, args.budget_ms)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Benchmark suite for the Video Generator.
+
+Synthesises image sequences at several resolutions, formats and frame
+counts, runs them through ``build_folder_video`` (the per-folder pipeline of
+the generator) and records per-stage timings, frames/sec and
+peak memory as JSON so results can be compared across commits.
+
+Every repetition runs in a fresh interpreter after the frames have been
+synthesised, so the reported peak RSS covers only the pipeline and does not
+depend on the order of the cases. The timed run is not traced; the
+tracemalloc peak comes from a separate traced run of each case.
+
+Example
+-------
+    python benchmark_video.py --resolutions 640x480 1920x1080 \
+        --formats png jpg tiff --counts 60 240 --output bench_video.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from generate_video import build_folder_video, find_image_files
+from stage_timing import StageTimer
+
+FORMAT_EXTENSIONS = {"png": ".png", "jpg": ".jpg", "tiff": ".tif"}
+
+
+def parse_resolution(text):
+    """
+    Parse a ``WIDTHxHEIGHT`` string into a (width, height) tuple.
+    """
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid resolution: {text} (expected WIDTHxHEIGHT)")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"Invalid resolution: {text}")
+    return width, height
+
+
+def synthesize_frames(folder_path, count, width, height, fmt, seed=0):
+    """
+    Write ``count`` synthetic frames of the given size and format into folder_path.
+
+    Frames contain a gradient background, a moving disc and mild noise so
+    that decoders and encoders do realistic work (flat frames compress
+    unrealistically well).
+    """
+    ext = FORMAT_EXTENSIONS[fmt]
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)
+    background = np.empty((height, width, 3), dtype=np.uint8)
+    background[..., 0] = x[None, :]
+    background[..., 1] = y[:, None]
+    background[..., 2] = 128
+    radius = max(4, min(width, height) // 8)
+
+    os.makedirs(folder_path, exist_ok=True)
+    for idx in range(count):
+        frame = background.copy()
+        cx = int((idx / max(count - 1, 1)) * (width - 2 * radius)) + radius
+        cv2.circle(frame, (cx, height // 2), radius, (255, 255, 255), -1)
+        noise = rng.integers(0, 16, size=frame.shape, dtype=np.uint8)
+        cv2.add(frame, noise, dst=frame)
+        cv2.imwrite(os.path.join(folder_path, f"frame_{idx:05d}{ext}"), frame)
+
+
+def max_rss_bytes():
+    """
+    Return the peak resident set size of this process in bytes.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def measure_pipeline(case_dir, frame_rate=30, trace_memory=False, verbose=False):
+    """
+    Run build_folder_video on case_dir in this process and return its measurements.
+
+    Called in a fresh interpreter (see run_pipeline_subprocess). With
+    trace_memory the run is traced with tracemalloc and only the traced peak
+    is meaningful; otherwise the run is timed untraced.
+    """
+    timer = StageTimer()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with output:
+        video_path = build_folder_video(case_dir, frame_rate=frame_rate, timer=timer)
+    total_seconds = time.perf_counter() - start
+    result = {
+        "video_path": video_path,
+        "total_seconds": total_seconds,
+        "stages": timer.as_dict(),
+        "max_rss_bytes": max_rss_bytes(),
+    }
+    if trace_memory:
+        result["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_pipeline_subprocess(case_dir, frame_rate=30, trace_memory=False, verbose=False):
+    """
+    Run measure_pipeline in a fresh interpreter and return its result dictionary.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", case_dir, "--frame-rate", str(frame_rate)]
+    if trace_memory:
+        command.append("--trace-memory")
+    if verbose:
+        command.append("--verbose")
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    *output, last = completed.stdout.splitlines()
+    if verbose and output:
+        print("\n".join(output))
+    return json.loads(last)
+
+
+def run_case(work_dir, width, height, fmt, count, frame_rate=30, repeat=1, verbose=False):
+    """
+    Run a single benchmark case and return one result dictionary per repetition.
+    """
+    case_dir = os.path.join(work_dir, f"{fmt}_{width}x{height}_{count}")
+    synthesize_frames(case_dir, count, width, height, fmt)
+    input_bytes = sum(entry.stat().st_size for entry in os.scandir(case_dir))
+    frames = len(find_image_files(case_dir))
+
+    try:
+        traced = run_pipeline_subprocess(case_dir, frame_rate, trace_memory=True)
+        results = []
+        for run in range(repeat):
+            measured = run_pipeline_subprocess(case_dir, frame_rate, verbose=verbose)
+            video_path = measured["video_path"]
+            total_seconds = measured["total_seconds"]
+            results.append({
+                "format": fmt,
+                "width": width,
+                "height": height,
+                "frames": frames,
+                "input_bytes": input_bytes,
+                "video_bytes": os.path.getsize(video_path) if video_path and os.path.exists(video_path) else 0,
+                "total_seconds": total_seconds,
+                "frames_per_second": frames / total_seconds if total_seconds > 0 else None,
+                "stages": measured["stages"],
+                "peak_traced_bytes": traced["peak_traced_bytes"],
+                "max_rss_bytes": measured["max_rss_bytes"],
+                "run": run,
+            })
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+    return results
+
+
+def environment_info():
+    """
+    Describe the machine and revision the benchmark ran on.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_benchmarks(resolutions, formats, counts, repeat=1, frame_rate=30, work_dir=None, verbose=False):
+    """
+    Run every combination of resolution, format and frame count.
+
+    Returns a dictionary with the environment description and one result per
+    case and repetition.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_video_", dir=work_dir) as tmp:
+        for width, height in resolutions:
+            for fmt in formats:
+                for count in counts:
+                    for result in run_case(tmp, width, height, fmt, count, frame_rate, repeat, verbose):
+                        results.append(result)
+                        print(f"{fmt:>4} {width}x{height} x{count}: "
+                              f"{result['frames_per_second']:.1f} frames/s, "
+                              f"total {result['total_seconds']:.2f}s")
+    return {"environment": environment_info(), "cases": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Video Generator on synthetic frame sequences")
+    parser.add_argument("--resolutions", nargs="+", type=parse_resolution, default=[(640, 480), (1920, 1080)],
+                        help="Frame sizes as WIDTHxHEIGHT (default: 640x480 1920x1080)")
+    parser.add_argument("--formats", nargs="+", choices=sorted(FORMAT_EXTENSIONS), default=["png", "jpg", "tiff"],
+                        help="Image formats to synthesise (default: png jpg tiff)")
+    parser.add_argument("--counts", nargs="+", type=int, default=[60],
+                        help="Number of frames per sequence (default: 60)")
+    parser.add_argument("--repeat", type=int, default=1, help="Repetitions per case (default: 1)")
+    parser.add_argument("--frame-rate", type=int, default=30, help="Output frame rate (default: 30)")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory for the synthetic sequences (default: system temp directory)")
+    parser.add_argument("--output", default="bench_video.json", help="JSON result file (default: bench_video.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show the video generator's own progress output")
+    # Internal: measure one synthesised case in this (fresh) process and print the result as JSON
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case is not None:
+        result = measure_pipeline(args.run_case, args.frame_rate, args.trace_memory, args.verbose)
+        print(json.dumps(result))
+        return
+
+    report = run_benchmarks(args.resolutions, args.formats, args.counts, args.repeat,
+                            args.frame_rate, args.work_dir, args.verbose)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
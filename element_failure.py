@@ -0,0 +1,202 @@
+"""
+Bulk evaluation of the polymer failure criterion over simulation element data.
+
+Element states exported from LS-DYNA runs are stored as ``.npy`` files holding
+one of
+
+- (n, 2)    principal stretches λ₁, λ₂ (incompressible, λ₃ = 1 / (λ₁λ₂))
+- (n, 3)    principal stretches λ₁, λ₂, λ₃
+- (n, 3, 3) or (n, 9) deformation gradients F (row-major)
+
+The input is memory-mapped and evaluated chunk by chunk across a process
+pool; failure indices and flags are written to a memory-mapped ``.npy`` file,
+so memory use is bounded by the chunk size regardless of the model size.
+
+Example
+-------
+    python element_failure.py stretches.npy failure.npy --gamma1 1 --gamma2 0.02 --level 20
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from polymer_failure import failure_index, stretch_invariants
+
+
+class ElementFailureSummary(NamedTuple):
+    """
+    Totals returned by evaluate_element_failure.
+    """
+    elements: int
+    failed: int
+
+
+def output_dtype(dtype=np.float64):
+    """
+    Structured dtype of the output file: the failure index F and the flag F >= level.
+    """
+    return np.dtype([("failure_index", dtype), ("failed", np.bool_)])
+
+
+def principal_stretches(deformation_gradients):
+    """
+    Compute principal stretches from a batch of deformation gradients.
+
+    The stretches are the square roots of the eigenvalues of the right
+    Cauchy-Green tensor C = FᵀF, computed with one batched eigvalsh call.
+
+    Parameters
+    ----------
+    deformation_gradients : array_like
+        Array of shape (n, 3, 3) or (n, 9) (row-major).
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n, 3), sorted in descending order per element.
+    """
+    F = np.asarray(deformation_gradients, dtype=np.float64).reshape(-1, 3, 3)
+    C = np.einsum("nki,nkj->nij", F, F)
+    eigenvalues = np.linalg.eigvalsh(C)
+    np.clip(eigenvalues, 0, None, out=eigenvalues)
+    return np.sqrt(eigenvalues)[:, ::-1]
+
+
+def element_invariants(data):
+    """
+    Compute I₁ and I₂ for a chunk of element data in any supported layout.
+
+    Raises
+    ------
+    ValueError
+        If the layout of data is not supported.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    layout = data.shape[1:]
+    if layout == (2,):
+        return stretch_invariants(data[:, 0], data[:, 1])
+    if layout in ((3, 3), (9,)):
+        data = principal_stretches(data)
+    elif layout != (3,):
+        raise ValueError(f"Unsupported element data layout {layout}; "
+                         "expected (2,), (3,), (3, 3) or (9,) per element")
+    sq = np.square(data)
+    I1 = sq.sum(axis=1)
+    I2 = sq[:, 0] * sq[:, 1] + sq[:, 1] * sq[:, 2] + sq[:, 2] * sq[:, 0]
+    return I1, I2
+
+
+def evaluate_elements(data, gamma1, gamma2, level):
+    """
+    Evaluate the failure criterion for an in-memory chunk of element data.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        (failure_index, failed) per element.
+    """
+    I1, I2 = element_invariants(data)
+    F = failure_index(I1, I2, gamma1, gamma2)
+    return F, F >= level
+
+
+def _evaluate_range(input_path, output_path, start, stop, gamma1, gamma2, level):
+    """
+    Evaluate elements [start, stop) and write them into the output memmap.
+    """
+    data = np.load(input_path, mmap_mode="r")
+    out = np.load(output_path, mmap_mode="r+")
+    F, failed = evaluate_elements(data[start:stop], gamma1, gamma2, level)
+    out["failure_index"][start:stop] = F
+    out["failed"][start:stop] = failed
+    out.flush()
+    return int(np.count_nonzero(failed))
+
+
+def evaluate_element_failure(input_path, output_path, gamma1, gamma2, level,
+                             chunk_size=1_000_000, workers=None, dtype=np.float64):
+    """
+    Evaluate the failure criterion for every element stored in input_path.
+
+    Parameters
+    ----------
+    input_path : str
+        ``.npy`` file with stretches or deformation gradients (see module
+        docstring). It is memory-mapped, never loaded whole.
+    output_path : str
+        ``.npy`` file to create, holding one output_dtype(dtype) record per
+        element.
+    gamma1, gamma2 : float
+        Criterion parameters γ₁ and γ₂.
+    level : float
+        Failure level; elements with F >= level are flagged as failed.
+    chunk_size : int, optional
+        Elements per task. Peak memory per worker is a small multiple of
+        chunk_size × the element record size.
+    workers : int, optional
+        Number of worker processes (default: os.cpu_count()). With 1 the
+        chunks are evaluated in this process.
+    dtype : numpy dtype, optional
+        Floating point type of the stored failure index.
+
+    Returns
+    -------
+    ElementFailureSummary
+
+    Raises
+    ------
+    FileNotFoundError
+        If input_path does not exist.
+    ValueError
+        If the input layout is not supported or chunk_size is not positive.
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"File not found: {input_path}")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    data = np.load(input_path, mmap_mode="r")
+    if data.shape[1:] not in ((2,), (3,), (3, 3), (9,)):
+        raise ValueError(f"Unsupported element data layout {data.shape[1:]}")
+    n = data.shape[0]
+    del data
+
+    out = np.lib.format.open_memmap(output_path, mode="w+", dtype=output_dtype(dtype), shape=(n,))
+    out.flush()
+    del out
+
+    starts = range(0, n, chunk_size)
+    stops = [min(start + chunk_size, n) for start in starts]
+    args = (itertools.repeat(input_path), itertools.repeat(output_path), starts, stops,
+            itertools.repeat(gamma1), itertools.repeat(gamma2), itertools.repeat(level))
+    if workers == 1 or len(stops) <= 1:
+        failed = sum(map(_evaluate_range, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            failed = sum(pool.map(_evaluate_range, *args))
+    return ElementFailureSummary(n, failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the polymer failure criterion for simulation elements")
+    parser.add_argument("input", help="Input .npy file with stretches or deformation gradients")
+    parser.add_argument("output", help="Output .npy file for failure indices and flags")
+    parser.add_argument("--gamma1", type=float, required=True, help="Criterion parameter γ₁")
+    parser.add_argument("--gamma2", type=float, required=True, help="Criterion parameter γ₂")
+    parser.add_argument("--level", type=float, required=True, help="Failure level F")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Elements per chunk (default: 1000000)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--float32", action="store_true", help="Store failure indices as float32")
+    args = parser.parse_args()
+
+    summary = evaluate_element_failure(args.input, args.output, args.gamma1, args.gamma2, args.level,
+                                       args.chunk_size, args.workers,
+                                       np.float32 if args.float32 else np.float64)
+    print(f"Evaluated {summary.elements} elements, {summary.failed} failed. Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
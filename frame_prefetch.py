@@ -0,0 +1,222 @@
+"""
+Read-ahead of frame files for the video generator.
+
+FramePrefetcher reads the upcoming frame files of a sequence into memory on a
+background thread, so decoding and encoding are not stalled on file-system
+latency (typically a NAS). The next frames are opened ahead with a
+``posix_fadvise`` WILLNEED hint, so the kernel fetches them in parallel, and
+read with large sequential reads; the consumer decodes the buffers
+(cv2.imdecode). Prefetchers of folders processed concurrently share one ReadAheadBudget, so
+the total read-ahead memory is bounded however many folders run at once.
+"""
+import collections
+import itertools
+import os
+import threading
+
+from stage_timing import timed
+
+# Size of the individual read() calls
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+# Defaults: frames read ahead per folder, and total bytes read ahead
+DEFAULT_PREFETCH_DEPTH = 8
+DEFAULT_PREFETCH_BYTES = 256 * 1024 * 1024
+
+
+def open_with_hints(path):
+    """
+    Open a file for unbuffered reading and tell the kernel it will soon be
+    read sequentially (where posix_fadvise is available), so it starts
+    fetching it in the background.
+    """
+    f = open(path, "rb", buffering=0)
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+    return f
+
+
+def read_open_file(f, size, chunk_bytes=READ_CHUNK_BYTES):
+    """
+    Read an open file of (expected) size bytes with large sequential reads
+    and return a bytearray.
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    read = 0
+    while read < size:
+        n = f.readinto(view[read:read + chunk_bytes])
+        if not n:
+            break
+        read += n
+    view.release()
+    if read < size:
+        del buffer[read:]
+    else:
+        # The file may have grown since fstat
+        buffer += f.read()
+    return buffer
+
+
+def read_file_sequential(path, chunk_bytes=READ_CHUNK_BYTES):
+    """
+    Read a whole file with large sequential reads and return a bytearray.
+    """
+    with open_with_hints(path) as f:
+        return read_open_file(f, os.fstat(f.fileno()).st_size, chunk_bytes)
+
+
+class ReadAheadBudget:
+    """
+    Byte budget shared by the FramePrefetchers of concurrently processed folders.
+
+    A reservation larger than the whole budget is granted once nothing else
+    is reserved, so an oversized frame cannot block forever.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_PREFETCH_BYTES):
+        self.max_bytes = max_bytes
+        self._used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size, cancelled=None):
+        """
+        Reserve size bytes, waiting for other reservations to be released.
+
+        Returns False without reserving if cancelled() becomes true while
+        waiting.
+        """
+        with self._condition:
+            while self._used and self._used + size > self.max_bytes:
+                if cancelled is not None and cancelled():
+                    return False
+                self._condition.wait(0.1)
+            self._used += size
+            return True
+
+    def release(self, size):
+        with self._condition:
+            self._used -= size
+            self._condition.notify_all()
+
+
+class FramePrefetcher:
+    """
+    Iterate over (path, data) for a list of files, read ahead on a thread.
+
+    At most ``depth`` files are buffered ahead of the consumer. Their bytes
+    are reserved on ``budget``, shared with other prefetchers, or on a
+    private ReadAheadBudget of ``max_bytes`` when no budget is given.
+    An error reading a file is re-raised when the consumer reaches it.
+    Use as a context manager so the reader thread stops if the consumer
+    gives up early.
+
+    ``timer`` records the ``read`` stage (reader thread) and the
+    ``prefetch_wait`` stage (time the consumer waited for data).
+    """
+
+    def __init__(self, paths, depth=DEFAULT_PREFETCH_DEPTH, max_bytes=DEFAULT_PREFETCH_BYTES, timer=None,
+                 budget=None):
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.paths = list(paths)
+        self.depth = depth
+        self.budget = budget if budget is not None else ReadAheadBudget(max_bytes)
+        self.timer = timer
+        self._queue = collections.deque()
+        self._done = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._read_ahead, daemon=True)
+        self._thread.start()
+
+    def _open(self, path):
+        try:
+            return path, open_with_hints(path), None
+        except Exception as e:
+            return path, None, e
+
+    def _read_ahead(self):
+        # The next ``depth`` files are kept open with a WILLNEED hint, so the
+        # kernel fetches them in parallel while the current one is read
+        upcoming = collections.deque()
+        paths = iter(self.paths)
+        try:
+            while True:
+                upcoming.extend(self._open(path)
+                                for path in itertools.islice(paths, self.depth + 1 - len(upcoming)))
+                if not upcoming:
+                    return
+                path, f, error = upcoming.popleft()
+                with self._condition:
+                    while not self._closed and len(self._queue) >= self.depth:
+                        self._condition.wait()
+                    if self._closed:
+                        if f is not None:
+                            f.close()
+                        return
+                data, size = None, 0
+                try:
+                    if f is not None:
+                        # fstat on the open file: no extra metadata round trip per frame
+                        size = os.fstat(f.fileno()).st_size
+                        if not self.budget.acquire(size, lambda: self._closed):
+                            return
+                        try:
+                            with timed(self.timer, "read"):
+                                data = read_open_file(f, size)
+                        except BaseException:
+                            self.budget.release(size)
+                            raise
+                except Exception as e:
+                    # Any failure (OSError, MemoryError, ...) is re-raised in the consumer
+                    data, size, error = None, 0, e
+                finally:
+                    if f is not None:
+                        f.close()
+                with self._condition:
+                    if self._closed:
+                        self.budget.release(size)
+                        return
+                    self._queue.append((path, data, error, size))
+                    self._condition.notify_all()
+        finally:
+            for _, f, _ in upcoming:
+                if f is not None:
+                    f.close()
+            # Always wake the consumer, even if this thread dies unexpectedly
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
+
+    def __iter__(self):
+        while True:
+            with timed(self.timer, "prefetch_wait"), self._condition:
+                while not self._queue and not self._done:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                path, data, error, size = self._queue.popleft()
+                self.budget.release(size)
+                self._condition.notify_all()
+            if error is not None:
+                raise error
+            yield path, data
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            for item in self._queue:
+                self.budget.release(item[3])
+            self._queue.clear()
+            self._condition.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -3,55 +3,34 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.lines import Line2D
 
-def general_failure_criterion_for_polymers(min_lambda=0.2, max_lambda=5, num_points=400):
+from yielding_surface import show_or_save
+from polymer_failure import failure_level_set
+
+def general_failure_criterion_for_polymers(min_lambda=0.2, max_lambda=5, num_points=400, output_path=None):
     """
     计算聚合物的一般失效准则
+    output_path: 输出图片路径（如 .png/.svg）。给定时保存图片而不显示窗口，可用于无界面的服务器。
     """
 
 
-    lambda1 = np.linspace(min_lambda, max_lambda, num_points)
-    lambda2 = np.linspace(min_lambda, max_lambda, num_points)
-    L1, L2 = np.meshgrid(lambda1, lambda2)   
-
-    L3 = 1 / (L2 * L1)
-
-    I1 = L1 ** 2 + L2 ** 2 + L3 ** 2
-    I2 = L1 ** 2 * L2 ** 2 + L2 ** 2 * L3 ** 2 + L3 ** 2 * L1 ** 2
-
-
-    def F(gamma1, gamma2):
-        return (I1 - 3) + gamma1 * (I1- 3) ** 2 + gamma2 * (I2 - 3)
-    
-    F_0_0_02 = F(0, 0.02)
-    F_0_0_04 = F(0, 0.2)
-    F_0_0_06 = F(0, 0.5)
-    F_0_0_08 = F(0, 1)
-    F_0_0_10 = F(0, 35)   
-
-
     # 创建图形
     plt.figure(figsize=(10, 8))
 
-    # 绘制等效应力为sigma_yield的等高线
-    # contour = plt.contour(L1, L2, F_0_0_02, levels=[10], colors='blue', linewidths=2)
-    
-    contour2 = plt.contour(L1, L2, F_0_0_04, levels=[20], colors='red', linewidths=2)
-    contour3 = plt.contour(L1, L2, F_0_0_06, levels=[20], colors='green', linewidths=2)
-    contour4 = plt.contour(L1, L2, F_0_0_08, levels=[20], colors='yellow', linewidths=2)
-    contour5 = plt.contour(L1, L2, F_0_0_10, levels=[45], colors='purple', linewidths=2)
-    # plt.clabel(contour, fmt='σ_eq = σ_yield', inline=True, fontsize=12)
-    F_1_0_02 = F(1, 0.02)
-    F_2_0_02 = F(2, 0.02)
-    F_3_0_02 = F(3, 0.02)
-    F_4_0_02 = F(4, 0.02)
-
-    contour6 = plt.contour(L1, L2, F_0_0_02, levels=[20], colors='blue', linewidths=2, linestyles='dotted')
-    contour7 = plt.contour(L1, L2, F_1_0_02, levels=[20], colors='red', linewidths=2, linestyles='dotted')
-    contour8 = plt.contour(L1, L2, F_2_0_02, levels=[20], colors='green', linewidths=2, linestyles='dotted')
-    contour9 = plt.contour(L1, L2, F_3_0_02, levels=[20], colors='yellow', linewidths=2, linestyles='dotted')
-    contour10 = plt.contour(L1, L2, F_4_0_02, levels=[20], colors='purple', linewidths=2, linestyles='dotted')
-
-   
+    # 各 (γ₁, γ₂, F) 组合的失效曲线，采用自适应细分只在曲线附近取样，避免稠密网格
+    curves = [
+        (0, 0.2, 20, 'red', 'solid'),
+        (0, 0.5, 20, 'green', 'solid'),
+        (0, 1, 20, 'yellow', 'solid'),
+        (0, 35, 45, 'purple', 'solid'),
+        (0, 0.02, 20, 'blue', 'dotted'),
+        (1, 0.02, 20, 'red', 'dotted'),
+        (2, 0.02, 20, 'green', 'dotted'),
+        (3, 0.02, 20, 'yellow', 'dotted'),
+        (4, 0.02, 20, 'purple', 'dotted'),
+    ]
+    for gamma1, gamma2, level, color, linestyle in curves:
+        for line in failure_level_set(gamma1, gamma2, level, min_lambda, max_lambda, num_points):
+            plt.plot(line[:, 0], line[:, 1], color=color, linewidth=2, linestyle=linestyle)
 
     # 填充屈服区域（等效应力 <= sigma_yield）   
     # plt.contourf(L1, L2, F, levels=[0, K], colors=['lightblue'], alpha=0.5)
@@ -129,8 +108,8 @@ def general_failure_criterion_for_polymers(min_lambda=0.2, max_lambda=5, num_poi
         Line2D([0], [0], marker='^', color='w', markerfacecolor='black', markersize=8, label='Point 2')
     ])
 
-    # 显示图形
-    plt.show()
+    # 显示或保存图形
+    show_or_save(output_path)
 
 
 if __name__ == "__main__":
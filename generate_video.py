@@ -1,19 +1,22 @@
+import argparse
 import os
 import shutil
-import cv2
-import numpy as np
 import time
 import logging
 import sys
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from frame_prefetch import DEFAULT_PREFETCH_BYTES, DEFAULT_PREFETCH_DEPTH, FramePrefetcher, ReadAheadBudget
+from stage_timing import timed
 if os.name == 'nt':  # Windows
     import msvcrt
 else:  # macOS and Linux
     import tty
     import termios
 
-# Setup basic configuration for logging
-logging.basicConfig(filename='VideoGenerator.log', filemode='a', level=logging.INFO,
-                   format='%(asctime)s - %(levelname)s - %(message)s')
+# cv2 is imported inside the functions that use it, so importing this module
+# (e.g. from main.py) stays fast and has no side effects. Logging is
+# configured by the entry point.
 
 def is_leaf_folder(folder_path):
     """
@@ -25,20 +28,34 @@ def is_leaf_folder(folder_path):
             return False
     return True
 
-def rename_images_in_folder(folder_path):
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".tif")
+# build_videos 每个工作线程最多同时提交的文件夹数
+MAX_IN_FLIGHT_PER_WORKER = 4
+
+def find_image_files(folder_path):
+    """
+    返回文件夹下所有图片文件名（按文件名排序）
+    """
+    files = [f for f in os.listdir(folder_path) if f.lower().endswith(IMAGE_EXTENSIONS)]
+    files.sort()
+    return files
+
+def rename_images_in_folder(folder_path, timer=None, files=None):
     """
     将文件夹下的所有图片按文件名排序，并重命名为统一前缀 + 序号的形式
     image_0001.jpg, image_0002.jpg ...
     返回重命名后的文件列表
+    timer 为可选的 StageTimer，用于统计 discovery / copy 阶段耗时
+    files 为已知的图片文件名列表（如遍历目录时已获得），为 None 时重新扫描文件夹
     """
-    exts = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".tif")
-    files = [f for f in os.listdir(folder_path) if f.lower().endswith(exts)]
+    with timed(timer, "discovery"):
+        if files is None:
+            files = find_image_files(folder_path)
+        else:
+            files = sorted(files)
     if not files:
         return []
 
-    # 排序
-    files.sort()
-    
     # 新建一个用于存放重命名后图片的临时文件夹
     tmp_folder = os.path.join(folder_path, "tmp_img_seq")
     if not os.path.exists(tmp_folder):
@@ -51,32 +68,19 @@ def rename_images_in_folder(folder_path):
         new_name = f"image_{idx:04d}{ext}"
         old_path = os.path.join(folder_path, file_name)
         new_path = os.path.join(tmp_folder, new_name)
-        shutil.copy2(old_path, new_path)  # 保留文件元数据复制
+        with timed(timer, "copy"):
+            shutil.copy2(old_path, new_path)  # 保留文件元数据复制
 
         new_file_list.append(new_path)
 
     return new_file_list
 
-def generate_mp4_from_images(folder_path, frame_rate=30, output_name="output.mp4"):
+def open_video_writer(out_path, frame_rate, frame_size):
     """
-    使用OpenCV将指定folder_path中的序列帧合成为MP4
-    output_name 为输出视频文件名
+    依次尝试可用的编码器，返回已打开的 cv2.VideoWriter
     """
-    tmp_folder = os.path.join(folder_path, "tmp_img_seq")
-    if not os.path.exists(tmp_folder):
-        return
-    
-    # 获取第一张图片来确定视频尺寸
-    image_files = sorted([f for f in os.listdir(tmp_folder) if f.startswith("image_")])
-    if not image_files:
-        return
-        
-    first_image = cv2.imread(os.path.join(tmp_folder, image_files[0]))
-    height, width = first_image.shape[:2]
-    
-    # Convert Windows path to forward slashes to avoid GStreamer issues
-    out_path = os.path.join(folder_path, output_name).replace('\\', '/')
-    
+    import cv2
+
     # Try different codecs in order of preference
     codecs = [
         ('mp4v', True),   # Try MPEG-4 first (more widely supported)
@@ -89,7 +93,7 @@ def generate_mp4_from_images(folder_path, frame_rate=30, output_name="output.mp4
     for codec, is_color in codecs:
         try:
             fourcc = cv2.VideoWriter_fourcc(*codec)
-            out = cv2.VideoWriter(out_path, fourcc, frame_rate, (width, height), is_color)
+            out = cv2.VideoWriter(out_path, fourcc, frame_rate, frame_size, is_color)
             if out is not None and out.isOpened():
                 print(f"Successfully initialized VideoWriter with codec: {codec}")
                 break
@@ -101,44 +105,240 @@ def generate_mp4_from_images(folder_path, frame_rate=30, output_name="output.mp4
                 out.release()
     
     if out is None or not out.isOpened():
-        raise RuntimeError(f"Error: Could not create video writer for {output_name}. No compatible codec found.")
-    
-    print(f"正在生成视频：{folder_path} -> {output_name}")
-    
-    # 添加时间统计
-    start_time = time.time()
-    total_frames = len(image_files)
-    
-    # 逐帧写入视频
-    for idx, image_file in enumerate(image_files, 1):
-        image_path = os.path.join(tmp_folder, image_file)
-        frame = cv2.imread(image_path)
-        
-        # Enhance contrast using CLAHE (Contrast Limited Adaptive Histogram Equalization)
-        lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
+        raise RuntimeError(f"Error: Could not create video writer for {out_path}. No compatible codec found.")
+    return out
+
+def enhance_contrast(frame, clahe):
+    """
+    在 LAB 色彩空间的亮度通道上应用 CLAHE 以增强对比度
+    """
+    import cv2
+
+    # Enhance contrast using CLAHE (Contrast Limited Adaptive Histogram Equalization)
+    lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    l = clahe.apply(l)
+    lab = cv2.merge((l,a,b))
+    return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+
+def decode_frame(data, path):
+    """
+    从内存中的图片文件数据解码出 BGR 帧，无法解码时抛出 ValueError
+    """
+    import cv2
+    import numpy as np
+
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError(f"Could not decode image {path}")
+    return frame
+
+def generate_mp4_from_images(folder_path, frame_rate=30, output_name="output.mp4", timer=None,
+                             prefetch_depth=DEFAULT_PREFETCH_DEPTH, prefetch_bytes=DEFAULT_PREFETCH_BYTES,
+                             image_paths=None, prefetch_budget=None):
+    """
+    使用OpenCV将指定folder_path中的序列帧合成为MP4
+    output_name 为输出视频文件名
+    timer 为可选的 StageTimer，用于统计 read / prefetch_wait / decode / clahe / encode / release 阶段耗时
+    prefetch_depth / prefetch_bytes 为后台线程预读的最大帧数 / 字节数（见 FramePrefetcher）
+    prefetch_budget 为多个文件夹共享的 ReadAheadBudget；给出时忽略 prefetch_bytes
+    image_paths 为按帧顺序排列的图片路径；为 None 时使用 rename_images_in_folder 生成的
+    tmp_img_seq 文件夹，并在完成后删除该文件夹
+    """
+    import cv2
+
+    tmp_folder = None
+    if image_paths is None:
+        tmp_folder = os.path.join(folder_path, "tmp_img_seq")
+        if not os.path.exists(tmp_folder):
+            return
+        image_paths = [os.path.join(tmp_folder, f)
+                       for f in sorted(os.listdir(tmp_folder)) if f.startswith("image_")]
+    if not image_paths:
+        return
+
+    # 后台线程顺序预读后续帧文件，解码与编码无需等待文件系统（如 NAS）
+    with FramePrefetcher(image_paths, prefetch_depth, prefetch_bytes, timer=timer,
+                         budget=prefetch_budget) as prefetcher:
+        frames = iter(prefetcher)
+
+        # 获取第一张图片来确定视频尺寸
+        image_path, data = next(frames)
+        with timed(timer, "decode"):
+            first_image = decode_frame(data, image_path)
+        height, width = first_image.shape[:2]
+
+        # Convert Windows path to forward slashes to avoid GStreamer issues
+        out_path = os.path.join(folder_path, output_name).replace('\\', '/')
+
+        out = open_video_writer(out_path, frame_rate, (width, height))
+
+        print(f"正在生成视频：{folder_path} -> {output_name}")
+
+        # 添加时间统计
+        start_time = time.time()
+        total_frames = len(image_paths)
         clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        l = clahe.apply(l)
-        lab = cv2.merge((l,a,b))
-        frame = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-        
-        out.write(frame)
-        
-        # 打印进度
-        if idx % 10 == 0 or idx == total_frames:
-            progress = (idx / total_frames) * 100
-            elapsed_time = time.time() - start_time
-            print(f"进度: {progress:.1f}% ({idx}/{total_frames}) - 已用时: {elapsed_time:.1f}秒", end='\r')
-    
+
+        # 逐帧写入视频
+        try:
+            for idx in range(1, total_frames + 1):
+                if idx == 1:
+                    frame = first_image
+                else:
+                    image_path, data = next(frames)
+                    with timed(timer, "decode"):
+                        frame = decode_frame(data, image_path)
+                    del data
+
+                with timed(timer, "clahe"):
+                    frame = enhance_contrast(frame, clahe)
+
+                with timed(timer, "encode"):
+                    out.write(frame)
+
+                # 打印进度
+                if idx % 10 == 0 or idx == total_frames:
+                    progress = (idx / total_frames) * 100
+                    elapsed_time = time.time() - start_time
+                    print(f"进度: {progress:.1f}% ({idx}/{total_frames}) - 已用时: {elapsed_time:.1f}秒", end='\r')
+        finally:
+            # 释放资源（写入容器尾部，单独计时，不计入逐帧的 encode）
+            with timed(timer, "release"):
+                out.release()
+
     # 完成后打印总用时
     total_time = time.time() - start_time
     print(f"\n视频生成完成！总用时: {total_time:.1f}秒")
     
-    # 释放资源
-    out.release()
-    
     # 生成完毕后，删除临时图片文件夹
-    shutil.rmtree(tmp_folder, ignore_errors=True)
+    if tmp_folder is not None:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+
+def build_folder_video(folder_path, frame_rate=30, files=None, timer=None,
+                       prefetch_depth=DEFAULT_PREFETCH_DEPTH, prefetch_bytes=DEFAULT_PREFETCH_BYTES,
+                       prefetch_budget=None):
+    """
+    将一个叶子文件夹中的序列帧合成为以文件夹命名的MP4
+    files 为已知的图片文件名列表，为 None 时自动扫描
+    prefetch_depth / prefetch_bytes / prefetch_budget 传给 generate_mp4_from_images
+    返回生成的视频路径；文件夹中没有图片时返回 None；出错时抛出异常
+    图片按文件名排序后直接从原位置预读，不再复制到临时文件夹
+    """
+    with timed(timer, "discovery"):
+        files = find_image_files(folder_path) if files is None else sorted(files)
+    if not files:
+        return None
+    output_name = f"{os.path.basename(folder_path)}.mp4"
+    generate_mp4_from_images(folder_path, frame_rate=frame_rate, output_name=output_name, timer=timer,
+                             prefetch_depth=prefetch_depth, prefetch_bytes=prefetch_bytes,
+                             image_paths=[os.path.join(folder_path, f) for f in files],
+                             prefetch_budget=prefetch_budget)
+    return os.path.join(folder_path, output_name)
+
+@dataclass
+class VideoOptions:
+    """
+    build_videos 的参数
+    frame_rate: 输出视频帧率
+    workers: 并行处理的文件夹数（1 为顺序处理）
+    prefetch_depth: 每个文件夹预读的最大帧数
+    prefetch_bytes: 所有并行文件夹合计预读的最大字节数
+    """
+    frame_rate: int = 30
+    workers: int = 1
+    prefetch_depth: int = DEFAULT_PREFETCH_DEPTH
+    prefetch_bytes: int = DEFAULT_PREFETCH_BYTES
+
+@dataclass
+class VideoResult:
+    """
+    build_videos 的结果
+    """
+    directory: str
+    videos: List[str] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def summary(self):
+        lines = [
+            f"Directory:           {self.directory}",
+            f"Videos created:      {len(self.videos)}",
+            f"Errors:              {len(self.errors)}",
+            f"Total time:          {self.elapsed_seconds:.1f} seconds",
+        ]
+        lines.extend(f"  {path}: {message}" for path, message in self.errors)
+        return "\n".join(lines)
+
+def build_videos(root, options=None):
+    """
+    将 root 下所有含图片的叶子文件夹合成为MP4（非交互式的库接口，不会提示输入或等待按键）
+    options 为 VideoOptions，为 None 时使用默认值
+    返回 VideoResult；root 不是有效目录时抛出 FileNotFoundError
+    """
+    # 在此导入 concurrent.futures，保持模块导入速度
+    from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    if root is None:
+        raise TypeError("directory is None")
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"directory {root} is not a valid directory")
+    if options is None:
+        options = VideoOptions()
+
+    result = VideoResult(directory=root)
+    start_time = time.time()
+
+    # 并行处理的文件夹共享同一预读内存上限
+    budget = ReadAheadBudget(options.prefetch_bytes)
+
+    def build(folder_path, images):
+        try:
+            return folder_path, build_folder_video(folder_path, options.frame_rate, images,
+                                                 prefetch_depth=options.prefetch_depth,
+                                                 prefetch_budget=budget), None
+        except Exception as e:
+            return folder_path, None, str(e)
+
+    def record(folder_path, video_path, error):
+        if error is not None:
+            logging.error(f"Error processing folder {folder_path}: {error}")
+            result.errors.append((folder_path, error))
+        elif video_path is not None:
+            logging.info(f"Successfully processed folder: {folder_path}")
+            result.videos.append(video_path)
+
+    workers = max(options.workers, 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # 边遍历边处理；同时提交的任务数有上限，内存不随目录树大小增长
+        max_in_flight = MAX_IN_FLIGHT_PER_WORKER * workers
+        futures = set()
+
+        def collect(return_when):
+            done, _ = wait(futures, return_when=return_when)
+            for future in done:
+                futures.remove(future)
+                record(*future.result())
+
+        # os.walk 已列出子文件夹，叶子文件夹无需再次扫描
+        for current_folder, dirs, files in os.walk(root):
+            if dirs:
+                continue
+            images = [f for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+            if not images:
+                continue
+            if workers == 1:
+                record(*build(current_folder, images))
+                continue
+            if len(futures) >= max_in_flight:
+                collect(FIRST_COMPLETED)
+            futures.add(pool.submit(build, current_folder, images))
+
+        if futures:
+            collect(ALL_COMPLETED)
+
+    result.elapsed_seconds = time.time() - start_time
+    return result
 
 def check_keyboard_interrupt():
     if os.name == 'nt':  # Windows
@@ -172,9 +372,9 @@ def wait_key():
                 break
             time.sleep(0.1)
 
-def main():
+def run():
     """
-    The main entry point for the video generator.
+    Run the video generator interactively.
     Processes image sequences in leaf folders and converts them to MP4 videos.
     """
     start_time = time.time()  # Add start time tracking
@@ -196,22 +396,10 @@ def main():
         if not os.path.isdir(root_folder):
             raise NotADirectoryError(f"Path is not a directory: {root_folder}")
 
-        processed_folders = 0
-        for current_folder, dirs, files in os.walk(root_folder):
-            if is_leaf_folder(current_folder):
-                try:
-                    new_files = rename_images_in_folder(current_folder)
-                    if len(new_files) > 0:
-                        folder_name = os.path.basename(current_folder)
-                        output_name = f"{folder_name}.mp4"
-                        generate_mp4_from_images(current_folder, frame_rate=30, output_name=output_name)
-                        processed_folders += 1
-                        logging.info(f"Successfully processed folder: {current_folder}")
-                    else:
-                        logging.info(f"Skipped folder (no images): {current_folder}")
-                except Exception as e:
-                    logging.error(f"Error processing folder {current_folder}: {str(e)}")
-                    print(f"\nError processing folder {current_folder}: {str(e)}")
+        result = build_videos(root_folder)
+        for folder_path, error in result.errors:
+            print(f"\nError processing folder {folder_path}: {error}")
+        processed_folders = len(result.videos)
 
         if processed_folders > 0:
             total_time = time.time() - start_time
@@ -232,5 +420,53 @@ def main():
         print(f"\nTotal run time: {total_run_time:.1f} seconds ({total_run_time/60:.1f} minutes)")
         wait_key()
 
+def build_and_report(directory, options):
+    """
+    非交互式地处理 directory 并打印结果摘要（命令行给出目录时使用）
+    """
+    result = build_videos(os.path.abspath(directory), options)
+    print("\n" + result.summary())
+    return result
+
+def main(argv=None):
+    """
+    The main entry point for the video generator (the ``video-generator`` console script).
+    不带目录参数时交互运行；给出目录时非交互运行，任何文件夹失败则以状态码 1 退出
+    argv 默认为 sys.argv[1:]；``--profile [PREFIX]`` 在性能分析下运行并输出 PREFIX.pstats / PREFIX.json
+    """
+    # Logging is configured here, once; the functions above leave it alone
+    logging.basicConfig(filename='VideoGenerator.log', filemode='a', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Video Generator - convert image sequences in leaf folders to MP4')
+    parser.add_argument('directory', nargs='?', default=None,
+                        help='Directory to process; omit to be prompted interactively')
+    parser.add_argument('--frame-rate', type=int, default=30, help='Frame rate of the videos (default: 30)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of folders processed in parallel (default: 1)')
+    parser.add_argument('--prefetch-depth', type=int, default=8,
+                        help='Frames read ahead per folder (default: 8)')
+    parser.add_argument('--prefetch-mb', type=int, default=256,
+                        help='Maximum megabytes read ahead in total, across parallel folders (default: 256)')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PREFIX',
+                        help='Profile the run and write PREFIX.pstats and PREFIX.json')
+    args = parser.parse_args(argv)
+
+    if args.directory is None:
+        target, target_args = run, ()
+    else:
+        options = VideoOptions(args.frame_rate, args.workers, args.prefetch_depth, args.prefetch_mb * 1024 * 1024)
+        target, target_args = build_and_report, (args.directory, options)
+
+    try:
+        if args.profile is None:
+            result = target(*target_args)
+        else:
+            from profiling import default_profile_prefix, run_profiled
+            result = run_profiled(target, args.profile or default_profile_prefix('video'), *target_args)
+    except (TypeError, FileNotFoundError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    if result is not None and result.errors:
+        sys.exit(1)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
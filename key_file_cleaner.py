@@ -1,7 +1,15 @@
+import argparse
+import importlib
 import os
 import logging
+import re
+import shutil
 import sys
+import tempfile
 import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from stage_timing import stage
 if os.name == 'nt':  # Windows
     import msvcrt
 else:  # macOS and Linux
@@ -9,10 +17,6 @@ else:  # macOS and Linux
     import termios
 
 
-# Setup basic configuration for logging
-logging.basicConfig(filename='KeyFileCleaner.log', filemode='a', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
-
 def line_to_keep(line: str) -> bool:
     """
     Determine if a line should be kept.
@@ -41,7 +45,7 @@ def line_to_keep(line: str) -> bool:
 
   
 
-def process_file(file_path: str) -> None:
+def process_file(file_path: str) -> Optional[int]:
     """
     Process a single .key file, removing unwanted lines.
 
@@ -52,7 +56,9 @@ def process_file(file_path: str) -> None:
 
     Returns
     -------
-    None
+    int or None
+        The number of lines removed, or None if the file could not be
+        processed (the error is logged).
 
     Raises
     ------
@@ -69,22 +75,325 @@ def process_file(file_path: str) -> None:
         raise ValueError("file_path is None or empty")
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
+    with stage("process_file"):
+        try:
+            # with open(file_path, 'r', encoding='utf-8') as file:
+            with open(file_path, 'r') as file:
+                lines = file.readlines()
+                count = len(lines)
+            new_lines = [line for line in lines if line_to_keep(line)]
+            count -= len(new_lines)
+            with open(file_path, 'w', encoding='utf-8') as file:
+                file.writelines(new_lines)
+            # print(f"Processed file: {file_path}, removed {count} lines.")
+            logging.info(f"Processed file: {file_path}, removed {count} lines.")
+            return count
+        except UnicodeDecodeError as e:
+            logging.error(f"Error decoding {file_path}: {str(e)}")
+        except Exception as e:
+            logging.error(f"Unhandled exception processing {file_path}: {str(e)}")
+            # raise
+    return None
+
+
+# Tasks kept in flight per worker thread before clean_tree's walk waits for results
+MAX_IN_FLIGHT_PER_WORKER = 4
+
+# Suffix of a compressed deck -> standard library module providing open()
+COMPRESSION_MODULES = {'.gz': 'gzip', '.xz': 'lzma', '.bz2': 'bz2'}
+# Decompressed data is filtered and recompressed in blocks of about this size
+STREAM_BLOCK_BYTES = 1 << 20
+# A '$' comment line, including its line break
+COMMENT_LINE_PATTERN = re.compile(rb'^\$[^\n]*(?:\n|\Z)', re.MULTILINE)
+
+
+def process_compressed_file(file_path: str) -> Optional[int]:
+    """
+    Strip '$' lines from a compressed .key file in a single streaming pass.
+
+    The deck is decompressed block by block, filtered and recompressed with
+    the same format into a temporary file next to it, which then replaces
+    the original. The decompressed deck never touches the disk and memory use
+    is bounded by STREAM_BLOCK_BYTES (plus the longest line), whatever the
+    size of the deck. Blocks are handled as bytes, so the original encoding
+    is kept unchanged. zlib, lzma and bz2 release the GIL while they work on
+    a block, so several decks can be processed in threads.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the compressed file (see COMPRESSION_MODULES).
+
+    Returns
+    -------
+    int or None
+        The number of lines removed, or None if the file could not be
+        processed (the error is logged and the original is left untouched).
+
+    Raises
+    ------
+    ValueError
+        If file_path is None or empty, or not a compressed file.
+    FileNotFoundError
+        If the file specified by file_path does not exist.
+    """
+    if file_path is None or file_path == '':
+        raise ValueError("file_path is None or empty")
+    suffix = os.path.splitext(file_path)[1]
+    if suffix not in COMPRESSION_MODULES:
+        raise ValueError(f"Not a compressed file: {file_path}")
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    codec = importlib.import_module(COMPRESSION_MODULES[suffix])
+    with stage("process_compressed_file"):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)),
+                                         prefix=f".{os.path.basename(file_path)}.", suffix='.tmp')
+        os.close(fd)
+        try:
+            count = 0
+            pending = b''
+            with codec.open(file_path, 'rb') as source, codec.open(temp_path, 'wb') as target:
+                while True:
+                    block = source.read(STREAM_BLOCK_BYTES)
+                    if not block:
+                        break
+                    # Filter complete lines only; the partial last line waits for the next block
+                    block = pending + block
+                    end = block.rfind(b'\n') + 1
+                    pending = block[end:]
+                    kept, removed = COMMENT_LINE_PATTERN.subn(b'', block[:end])
+                    target.write(kept)
+                    count += removed
+                kept, removed = COMMENT_LINE_PATTERN.subn(b'', pending)
+                target.write(kept)
+                count += removed
+            shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+            logging.info(f"Processed file: {file_path}, removed {count} lines.")
+            return count
+        except Exception as e:
+            logging.error(f"Unhandled exception processing {file_path}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return None
+
+
+FILE_EXTENSIONS_TO_REMOVE = ('.ansa', '.hm', '.mvw', '.catpart', '.cfile')
+FILE_STARTS_TO_REMOVE = ("._", "ansa", ".lock", "d3d", "d3f", "lsrun", "mess", "d3h", 'lspost')
+KEY_FILE_EXTENSIONS = ('.key', '.k')
+
+
+def is_file_to_remove(file_name: str, remove_d3p: bool) -> bool:
+    """
+    Determine if a file is junk that the cleaner deletes.
+
+    Parameters
+    ----------
+    file_name : str
+        The file name (without directory).
+    remove_d3p : bool
+        Whether d3plot files (starting with "d3p") are removed as well.
+
+    Returns
+    -------
+    bool
+        True if the file should be removed, False otherwise.
+    """
+    name = file_name.lower()
+    if name.endswith(FILE_EXTENSIONS_TO_REMOVE) or name.startswith(FILE_STARTS_TO_REMOVE):
+        return True
+    return remove_d3p and name.startswith("d3p")
+
+
+def is_key_file(file_name: str) -> bool:
+    """
+    Determine if a file is a keyword deck whose '$' lines are stripped.
+    """
+    return file_name.endswith(KEY_FILE_EXTENSIONS)
+
+
+def is_compressed_key_file(file_name: str) -> bool:
+    """
+    Determine if a file is a gzip-, xz- or bzip2-compressed keyword deck.
+    """
+    base, suffix = os.path.splitext(file_name)
+    return suffix in COMPRESSION_MODULES and is_key_file(base)
+
+
+def remove_file(file_path: str) -> bool:
+    """
+    Remove a single file, logging failures instead of raising.
+
+    Returns
+    -------
+    bool
+        True if the file was removed, False otherwise.
+    """
     try:
-        # with open(file_path, 'r', encoding='utf-8') as file:
-        with open(file_path, 'r') as file:
-            lines = file.readlines()
-            count = len(lines)
-        new_lines = [line for line in lines if line_to_keep(line)]
-        count -= len(new_lines)
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.writelines(new_lines)
-        # print(f"Processed file: {file_path}, removed {count} lines.")
-        logging.info(f"Processed file: {file_path}, removed {count} lines.")
-    except UnicodeDecodeError as e:
-        logging.error(f"Error decoding {file_path}: {str(e)}")
+        with stage("os.remove"):
+            os.remove(file_path)
+        return True
     except Exception as e:
-        logging.error(f"Unhandled exception processing {file_path}: {str(e)}")
-        # raise
+        logging.error(f"Failed to remove {file_path}`: {str(e)}")
+        return False
+
+
+@dataclass
+class CleanOptions:
+    """
+    Options for clean_tree.
+
+    Attributes
+    ----------
+    remove_d3p : bool
+        Also remove d3plot files (names starting with "d3p").
+    workers : int
+        Number of threads removing and cleaning files (1 = sequential).
+    compressed_workers : int, optional
+        Number of threads cleaning compressed decks, alongside the threads
+        above (default: os.cpu_count()).
+    """
+    remove_d3p: bool = False
+    workers: int = 1
+    compressed_workers: Optional[int] = None
+
+
+@dataclass
+class CleanResult:
+    """
+    Result of clean_tree.
+    """
+    directory: str
+    files_removed: int = 0
+    key_files_processed: int = 0
+    lines_removed: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"Directory:           {self.directory}",
+            f"Files removed:       {self.files_removed}",
+            f"Key files cleaned:   {self.key_files_processed} ({self.lines_removed} lines removed)",
+            f"Errors:              {len(self.errors)}",
+            f"Total time:          {self.elapsed_seconds:.1f} seconds",
+        ]
+        lines.extend(f"  {path}: {message}" for path, message in self.errors)
+        return "\n".join(lines)
+
+
+def clean_tree(root: str, options: Optional[CleanOptions] = None) -> CleanResult:
+    """
+    Remove junk files and strip '$' lines from .key files under root.
+
+    Compressed decks (.key.gz, .k.xz, ...) are cleaned by
+    process_compressed_file on a separate thread pool, since recompression
+    is CPU-bound (the codecs release the GIL), while the plain files are
+    handled by the first pool.
+
+    This is the non-interactive library API: it never prompts or waits for a
+    key, so a long-lived process can call it for many directories.
+
+    Parameters
+    ----------
+    root : str
+        The directory to search for files to process.
+    options : CleanOptions, optional
+        Cleaning options; defaults to CleanOptions().
+
+    Returns
+    -------
+    CleanResult
+
+    Raises
+    ------
+    TypeError
+        If root is None.
+    FileNotFoundError
+        If the directory specified by root does not exist.
+    """
+    # Imported here: concurrent.futures is not needed to import this module
+    from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    if root is None:
+        raise TypeError("directory is None")
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"directory {root} is not a valid directory")
+    if options is None:
+        options = CleanOptions()
+
+    result = CleanResult(directory=root)
+    start_time = time.time()
+
+    def handle(kind: str, file_path: str) -> Tuple[str, str, object]:
+        # A failing file (e.g. deleted during the run) is recorded, not raised
+        try:
+            if kind == "remove":
+                return kind, file_path, remove_file(file_path)
+            if kind == "compressed":
+                return kind, file_path, process_compressed_file(file_path)
+            return kind, file_path, process_file(file_path)
+        except Exception as e:
+            return kind, file_path, e
+
+    def record(kind: str, file_path: str, outcome: object) -> None:
+        if isinstance(outcome, Exception):
+            logging.error(f"Unhandled exception processing {file_path}: {str(outcome)}")
+            result.errors.append((file_path, str(outcome)))
+        elif kind == "remove":
+            if outcome:
+                result.files_removed += 1
+                logging.info(f"Removed file: {file_path}, {result.files_removed}")
+            else:
+                result.errors.append((file_path, "failed to remove file"))
+        elif outcome is None:
+            result.errors.append((file_path, "failed to process key file"))
+        else:
+            result.key_files_processed += 1
+            result.lines_removed += outcome
+
+    workers = max(options.workers, 1)
+    compressed_workers = options.compressed_workers or os.cpu_count() or 1
+    # Files are handled while the tree is walked. Compressed decks go to their own pool so they
+    # run alongside the plain files; with workers == 1 the plain files are handled inline.
+    # Workers only touch the file system; the result is aggregated here
+    with ThreadPoolExecutor(max_workers=compressed_workers) as compressed_pool, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        # Bound the futures in flight so memory does not grow with the size of the tree
+        max_in_flight = MAX_IN_FLIGHT_PER_WORKER * (workers + compressed_workers)
+        futures = set()
+
+        def collect(return_when: str) -> None:
+            done, _ = wait(futures, return_when=return_when)
+            for future in done:
+                futures.remove(future)
+                record(*future.result())
+
+        for dir_path, dirs, files in os.walk(root):
+            for file in files:
+                if file is None:
+                    raise Exception("file is None")
+                if is_file_to_remove(file, options.remove_d3p):
+                    kind = "remove"
+                elif is_key_file(file):
+                    kind = "clean"
+                elif is_compressed_key_file(file):
+                    kind = "compressed"
+                else:
+                    continue
+                file_path = os.path.join(dir_path, file)
+                if kind != "compressed" and workers == 1:
+                    record(*handle(kind, file_path))
+                    continue
+                if len(futures) >= max_in_flight:
+                    collect(FIRST_COMPLETED)
+                futures.add((compressed_pool if kind == "compressed" else pool).submit(handle, kind, file_path))
+
+        if futures:
+            collect(ALL_COMPLETED)
+
+    result.elapsed_seconds = time.time() - start_time
+    return result
 
 
 def remove_lines_in_files(directory: str, remove_d3p: bool) -> None:
@@ -92,8 +401,10 @@ def remove_lines_in_files(directory: str, remove_d3p: bool) -> None:
     Walk through the directory and process each .key file.
 
     For each file in the directory, check if it has an extension or start
-    in file_extensions_to_remove. If so, remove the file.
-    If the file is a .key file, process it.
+    in FILE_EXTENSIONS_TO_REMOVE/FILE_STARTS_TO_REMOVE. If so, remove the file.
+    If the file is a .key file, process it; compressed decks (.key.gz,
+    .k.xz, ...) are cleaned in a streaming pass without decompressing them
+    to disk.
 
     Parameters
     ----------
@@ -111,35 +422,7 @@ def remove_lines_in_files(directory: str, remove_d3p: bool) -> None:
     FileNotFoundError
         If the directory specified by directory does not exist.
     """
-    if directory is None:
-        raise TypeError("directory is None")
-    if not os.path.isdir(directory):
-        raise FileNotFoundError(f"directory {directory} is not a valid directory")
-
-    file_extensions_to_remove = ['.ansa', '.hm', '.mvw', '.catpart', '.cfile']
-    file_starts_to_remove = ["._", "ansa", ".lock", "d3d", "d3f", "lsrun", ".lock","mess", "d3h", 'lspost']
-    if remove_d3p:
-        file_starts_to_remove.append("d3p")
-    files_removed = 0
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file is None:
-                raise Exception("file is None")
-            file_path = os.path.join(root, file)
-            if file.lower().endswith(tuple(file_extensions_to_remove)) or file.lower().startswith(tuple(file_starts_to_remove)):
-                try:
-                    os.remove(file_path)
-                    files_removed += 1
-                    logging.info(f"Removed file: {file_path}, {files_removed}")
-                except Exception as e:
-                    logging.error(f"Failed to remove {file_path}`: {str(e)}")
-                    
-            elif file.endswith(('.key', '.k')):
-                try:
-                    process_file(file_path)
-                except Exception as e:
-                    logging.error(f"Unhandled exception processing {file_path}: {str(e)}")
-                    raise
+    clean_tree(directory, CleanOptions(remove_d3p=remove_d3p))
     print("All .key files have been processed.")
 
 def check_keyboard_interrupt():
@@ -200,9 +483,9 @@ def write_file(file_path: str, content: str) -> None:
     except Exception as e:
         logging.error(f"Failed to write file {file_path}: {str(e)}")
  
-def main() -> None:
+def run() -> None:
     """
-    The main entry point for the program.
+    Run the Key File Cleaner interactively.
 
     Asks the user for the directory to process and then calls remove_lines_in_files with that directory.
     Also checks for null pointer references, unhandled exceptions, and other potential bugs.
@@ -254,5 +537,66 @@ def main() -> None:
         wait_key()
 
 
+def clean_and_report(directory: str, options: CleanOptions) -> CleanResult:
+    """
+    Clean directory without prompting and print the result summary.
+
+    Used by the command line when a directory is given.
+    """
+    result = clean_tree(os.path.abspath(directory), options)
+    print(result.summary())
+    return result
+
+
+def main(argv=None) -> None:
+    """
+    The main entry point for the program (the ``key-cleaner`` console script).
+
+    Without a directory argument the cleaner runs interactively. With one it
+    runs non-interactively and exits with status 1 if any file failed.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        Command-line arguments; defaults to sys.argv[1:].
+        ``--profile [PREFIX]`` runs the cleaner under the profiler and
+        writes PREFIX.pstats and PREFIX.json.
+
+    Returns
+    -------
+    None
+    """
+    # Logging is configured here, once; the functions above leave it alone
+    logging.basicConfig(filename='KeyFileCleaner.log', filemode='a', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Key File Cleaner - remove $ comment lines and junk files')
+    parser.add_argument('directory', nargs='?', default=None,
+                        help='Directory to process; omit to be prompted interactively')
+    parser.add_argument('--remove-d3p', action='store_true', help='Also remove d3plot files')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker threads (default: 1)')
+    parser.add_argument('--compressed-workers', type=int, default=None,
+                        help='Number of threads cleaning compressed decks (default: CPU count)')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PREFIX',
+                        help='Profile the run and write PREFIX.pstats and PREFIX.json')
+    args = parser.parse_args(argv)
+
+    if args.directory is None:
+        target, target_args = run, ()
+    else:
+        target, target_args = clean_and_report, (args.directory, CleanOptions(args.remove_d3p, args.workers, args.compressed_workers))
+
+    try:
+        if args.profile is None:
+            result = target(*target_args)
+        else:
+            from profiling import default_profile_prefix, run_profiled
+            result = run_profiled(target, args.profile or default_profile_prefix('clean'), *target_args)
+    except (TypeError, FileNotFoundError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    if result is not None and result.errors:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,6 +1,5 @@
 import argparse
 import sys
-from pathlib import Path
 import os
 import logging
 
@@ -16,27 +15,42 @@ def show_menu():
 ║                                  ║
 ║  1. Key File Cleaner            ║
 ║  2. Video Generator             ║
+║  3. Batch (Clean + Video)       ║
 ║  0. Exit                        ║
 ║                                  ║
 ╚══════════════════════════════════╝
     """)
-    return input("Please select a tool (0-2): ")
+    return input("Please select a tool (0-3): ")
 
-def run_key_file_cleaner():
+def run_key_file_cleaner(directory=None, remove_d3p=False, workers=1, compressed_workers=None):
+    """
+    Run the Key File Cleaner; returns the CleanResult when a directory is given, else None.
+    """
     try:
-        from key_file_cleaner import main as key_cleaner_main
-        key_cleaner_main()
+        if directory is None:
+            from key_file_cleaner import run as key_cleaner_run
+            key_cleaner_run()
+        else:
+            from key_file_cleaner import CleanOptions, clean_and_report
+            return clean_and_report(directory, CleanOptions(remove_d3p=remove_d3p, workers=workers,
+                                                            compressed_workers=compressed_workers))
     except ImportError:
         print("Error: Could not import key_file_cleaner module")
         sys.exit(1)
     except FileNotFoundError as e:
         print(f"\nError: {str(e)}")
-        input("\nPress Enter to continue...")
+        if directory is None:
+            input("\nPress Enter to continue...")
     except Exception as e:
         print(f"\nUnexpected error: {str(e)}")
-        input("\nPress Enter to continue...")
+        if directory is None:
+            input("\nPress Enter to continue...")
 
-def run_video_generator():
+def run_video_generator(directory=None, frame_rate=30, workers=1, prefetch_depth=8,
+                        prefetch_bytes=256 * 1024 * 1024):
+    """
+    Run the Video Generator; returns the VideoResult when a directory is given, else None.
+    """
     try:
         # Get the application path (works in both dev and packaged environments)
         if getattr(sys, 'frozen', False):
@@ -50,16 +64,39 @@ def run_video_generator():
         if application_path not in sys.path:
             sys.path.insert(0, application_path)
         
-        from generate_video import main as video_generator_main
-        video_generator_main()
+        if directory is None:
+            from generate_video import run as video_generator_run
+            video_generator_run()
+        else:
+            from generate_video import VideoOptions, build_and_report
+            return build_and_report(directory, VideoOptions(frame_rate=frame_rate, workers=workers,
+                                                            prefetch_depth=prefetch_depth,
+                                                            prefetch_bytes=prefetch_bytes))
     except ImportError as e:
         print(f"Error: Could not import generate_video module ({str(e)})")
         logging.error(f"Import error in run_video_generator: {str(e)}")
-        input("\nPress Enter to continue...")
+        if directory is None:
+            input("\nPress Enter to continue...")
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         logging.error(f"Unexpected error in run_video_generator: {str(e)}")
-        input("\nPress Enter to continue...")
+        if directory is None:
+            input("\nPress Enter to continue...")
+
+def run_batch_runner(directory=None, remove_d3p=None, frame_rate=30, workers=None, prefetch_depth=8,
+                     prefetch_bytes=256 * 1024 * 1024):
+    """
+    Run the batch runner; returns the BatchReport, or None if it failed.
+    """
+    try:
+        from batch_runner import main as batch_runner_main
+        return batch_runner_main(directory, remove_d3p, frame_rate, workers, prefetch_depth, prefetch_bytes)
+    except ImportError as e:
+        print(f"Error: Could not import batch_runner module ({str(e)})")
+        logging.error(f"Import error in run_batch_runner: {str(e)}")
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        logging.error(f"Unexpected error in run_batch_runner: {str(e)}")
 
 def interactive_mode():
     while True:
@@ -72,6 +109,10 @@ def interactive_mode():
             print("\nRunning Video Generator...")
             run_video_generator()
             input("\nPress Enter to continue...")
+        elif choice == '3':
+            print("\nRunning Batch (Clean + Video)...")
+            run_batch_runner()
+            input("\nPress Enter to continue...")
         elif choice == '0':
             print("\nExiting...")
             sys.exit(0)
@@ -80,20 +121,55 @@ def interactive_mode():
             input("Press Enter to continue...")
 
 def main():
+    # Logging is configured once here for every tool; the tools never configure it themselves
+    logging.basicConfig(filename='WeilanToolkit.log', filemode='a', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
     # Check if command-line arguments are provided
     if len(sys.argv) > 1:
         parser = argparse.ArgumentParser(description='Weilan Auto Toolkit - A collection of commonly used tools')
-        parser.add_argument('tool', choices=['clean', 'video'],
-                          help='Choose which tool to run: "clean" for Key File Cleaner, "video" for Video Generator')
+        parser.add_argument('tool', choices=['clean', 'video', 'batch'],
+                          help='Choose which tool to run: "clean" for Key File Cleaner, "video" for Video Generator, '
+                               '"batch" to clean and generate videos in one pass')
+        parser.add_argument('-d', '--directory', default=None,
+                          help='Directory to process; runs non-interactively (prompted for if omitted)')
+        parser.add_argument('--remove-d3p', action='store_true', default=None,
+                          help='Also remove d3plot files (clean/batch)')
+        parser.add_argument('--frame-rate', type=int, default=30,
+                          help='Frame rate of generated videos (video/batch, default: 30)')
+        parser.add_argument('--workers', type=int, default=None,
+                          help='Number of worker threads (default: 1 for clean/video, automatic for batch)')
+        parser.add_argument('--compressed-workers', type=int, default=None,
+                          help='Number of threads cleaning compressed decks (clean, default: CPU count)')
+        parser.add_argument('--prefetch-depth', type=int, default=8,
+                          help='Frames read ahead per video folder (video/batch, default: 8)')
+        parser.add_argument('--prefetch-mb', type=int, default=256,
+                          help='Megabytes read ahead in total across video folders (video/batch, default: 256)')
+        parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PREFIX',
+                          help='Profile the run and write PREFIX.pstats and PREFIX.json')
         
         args = parser.parse_args()
 
         if args.tool == 'clean':
             print("Running Key File Cleaner...")
-            run_key_file_cleaner()
+            runner, runner_args = run_key_file_cleaner, (args.directory, bool(args.remove_d3p), args.workers or 1,
+                                                         args.compressed_workers)
         elif args.tool == 'video':
             print("Running Video Generator...")
-            run_video_generator()
+            runner, runner_args = run_video_generator, (args.directory, args.frame_rate, args.workers or 1,
+                                                        args.prefetch_depth, args.prefetch_mb * 1024 * 1024)
+        elif args.tool == 'batch':
+            print("Running Batch (Clean + Video)...")
+            runner, runner_args = run_batch_runner, (args.directory, args.remove_d3p, args.frame_rate, args.workers,
+                                                     args.prefetch_depth, args.prefetch_mb * 1024 * 1024)
+
+        if args.profile is None:
+            result = runner(*runner_args)
+        else:
+            from profiling import default_profile_prefix, run_profiled
+            result = run_profiled(runner, args.profile or default_profile_prefix(args.tool), *runner_args)
+        # Non-interactive runs exit with status 1 if the tool failed or any file or folder failed
+        if args.directory is not None and (result is None or result.errors):
+            sys.exit(1)
     else:
         # No arguments provided, run in interactive mode
         interactive_mode()
@@ -0,0 +1,196 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from level_set import adaptive_level_set, marching_squares
+
+
+class FailureSweep(NamedTuple):
+    """
+    Result of evaluate_failure_sweep.
+
+    values has shape (n_params,) + grid shape and holds F for every
+    parameter set (None when values were not requested). exceeded holds
+    F >= level per parameter set (None when no levels were given).
+    """
+    values: Optional[np.ndarray]
+    exceeded: Optional[np.ndarray]
+
+
+def stretch_grid(min_lambda=0.2, max_lambda=5, num_points=400, dtype=np.float64):
+    """
+    Create the λ₁/λ₂ meshgrid used by the polymer failure criterion plots.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        (L1, L2), each of shape (num_points, num_points).
+    """
+    lambdas = np.linspace(min_lambda, max_lambda, num_points, dtype=dtype)
+    return np.meshgrid(lambdas, lambdas)
+
+
+def stretch_invariants(lambda1, lambda2, dtype=np.float64):
+    """
+    Compute the invariants I₁ and I₂ for incompressible deformation.
+
+    λ₃ = 1 / (λ₁λ₂), I₁ = λ₁² + λ₂² + λ₃² and
+    I₂ = λ₁²λ₂² + λ₂²λ₃² + λ₃²λ₁².
+
+    Parameters
+    ----------
+    lambda1, lambda2 : array_like
+        Principal stretches λ₁ and λ₂ (broadcastable shapes).
+    dtype : numpy dtype, optional
+        Floating point type of the results (default float64).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        (I1, I2)
+    """
+    l1_sq = np.square(np.asarray(lambda1, dtype=dtype))
+    l2_sq = np.square(np.asarray(lambda2, dtype=dtype))
+    l3_sq = 1 / (l1_sq * l2_sq)
+    I1 = l1_sq + l2_sq + l3_sq
+    I2 = l1_sq * l2_sq + (l1_sq + l2_sq) * l3_sq
+    return I1, I2
+
+
+def failure_index(I1, I2, gamma1, gamma2):
+    """
+    Evaluate F = (I₁ − 3) + γ₁(I₁ − 3)² + γ₂(I₂ − 3) for a single parameter pair.
+    """
+    I1_dev = I1 - 3
+    return I1_dev + gamma1 * I1_dev ** 2 + gamma2 * (I2 - 3)
+
+
+def evaluate_failure_sweep(I1, I2, gamma1, gamma2, levels=None, dtype=np.float64,
+                           max_chunk_bytes=64 * 2**20, return_values=True, out=None):
+    """
+    Evaluate the polymer failure criterion for a vector of (γ₁, γ₂, level) sets.
+
+    The invariant terms (I₁ − 3), (I₁ − 3)² and (I₂ − 3) are computed once
+    and shared by all parameter sets. Parameter sets are processed in
+    chunks so that the scratch memory stays below max_chunk_bytes no matter
+    how many sets are evaluated.
+
+    Parameters
+    ----------
+    I1, I2 : array_like
+        Invariants, e.g. from stretch_invariants. Must have the same shape.
+    gamma1, gamma2 : array_like
+        γ₁ and γ₂ per parameter set; scalars are broadcast.
+    levels : array_like, optional
+        Failure level per parameter set. When given, exceeded = F >= level
+        is returned as well.
+    dtype : numpy dtype, optional
+        float32 halves memory and bandwidth; float64 is the default.
+    max_chunk_bytes : int, optional
+        Upper bound on the scratch memory used per chunk (default 64 MiB).
+        At least one parameter set is evaluated per chunk.
+    return_values : bool, optional
+        If False, F is only used to compute exceeded and is not kept, so
+        memory use is independent of the number of parameter sets apart
+        from the boolean result.
+    out : numpy.ndarray, optional
+        Preallocated array (e.g. a memmap) of shape (n_params,) + I1.shape
+        to receive F.
+
+    Returns
+    -------
+    FailureSweep
+
+    Raises
+    ------
+    ValueError
+        If I1 and I2 differ in shape, return_values is False without levels,
+        or out has the wrong shape.
+    """
+    I1_dev = np.asarray(I1, dtype=dtype) - 3
+    I2_dev = np.asarray(I2, dtype=dtype) - 3
+    if I1_dev.shape != I2_dev.shape:
+        raise ValueError(f"I1 and I2 must have the same shape, got {I1_dev.shape} and {I2_dev.shape}")
+    if not return_values and levels is None:
+        raise ValueError("levels are required when return_values is False")
+    I1_dev_sq = np.square(I1_dev)
+
+    if levels is None:
+        gamma1, gamma2 = np.broadcast_arrays(np.asarray(gamma1, dtype=dtype), np.asarray(gamma2, dtype=dtype))
+    else:
+        gamma1, gamma2, levels = np.broadcast_arrays(np.asarray(gamma1, dtype=dtype),
+                                                     np.asarray(gamma2, dtype=dtype),
+                                                     np.asarray(levels, dtype=dtype))
+        levels = levels.ravel()
+    gamma1 = gamma1.ravel()
+    gamma2 = gamma2.ravel()
+    n_params = gamma1.size
+    grid_shape = I1_dev.shape
+    full_shape = (n_params,) + grid_shape
+    expand = (slice(None),) + (None,) * I1_dev.ndim
+
+    values = None
+    if return_values:
+        if out is None:
+            values = np.empty(full_shape, dtype=dtype)
+        elif out.shape != full_shape:
+            raise ValueError(f"out must have shape {full_shape}, got {out.shape}")
+        else:
+            values = out
+    exceeded = None if levels is None else np.empty(full_shape, dtype=bool)
+
+    # Two chunk-sized buffers at most: the F values and the γ₂(I₂ − 3) term
+    chunk = max(1, int(max_chunk_bytes // (2 * max(I1_dev.nbytes, 1))))
+    scratch = np.empty((min(chunk, n_params),) + grid_shape, dtype=dtype)
+    result = None if values is not None and values.dtype == dtype else np.empty_like(scratch)
+    for start in range(0, n_params, chunk):
+        stop = min(start + chunk, n_params)
+        dst = values[start:stop] if result is None else result[:stop - start]
+        g1 = gamma1[start:stop][expand]
+        g2 = gamma2[start:stop][expand]
+        tmp = scratch[:stop - start]
+
+        np.multiply(g1, I1_dev_sq, out=dst)
+        dst += I1_dev
+        np.multiply(g2, I2_dev, out=tmp)
+        dst += tmp
+
+        if result is not None and values is not None:
+            values[start:stop] = dst
+        if exceeded is not None:
+            np.greater_equal(dst, levels[start:stop][expand], out=exceeded[start:stop])
+
+    return FailureSweep(values, exceeded)
+
+
+def failure_contours(gamma1, gamma2, level, min_lambda=0.2, max_lambda=5, num_points=400):
+    """
+    Extract the F = level curve in the λ₁-λ₂ plane without plotting.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        One (n, 2) array of (λ₁, λ₂) points per polyline.
+    """
+    L1, L2 = stretch_grid(min_lambda, max_lambda, num_points)
+    I1, I2 = stretch_invariants(L1, L2)
+    return marching_squares(L1, L2, failure_index(I1, I2, gamma1, gamma2), level)
+
+
+def failure_level_set(gamma1, gamma2, level, min_lambda=0.2, max_lambda=5, num_points=400, refinements=4):
+    """
+    Trace the F = level curve with adaptive refinement instead of a dense grid.
+
+    Only cells near the curve are evaluated, so the result has the accuracy
+    of a num_points x num_points grid at a small fraction of its cost.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        One (n, 2) array of (λ₁, λ₂) points per polyline.
+    """
+    def F(lambda1, lambda2):
+        return failure_index(*stretch_invariants(lambda1, lambda2), gamma1, gamma2)
+
+    return adaptive_level_set(F, level, (min_lambda, max_lambda), (min_lambda, max_lambda),
+                              num_points, refinements).polylines
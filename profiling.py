@@ -0,0 +1,152 @@
+"""
+Profiling hooks for the toolkit entry points.
+
+run_profiled wraps a tool run with cProfile, tracemalloc sampling and the
+per-stage timers from stage_timing, then writes
+
+- ``<prefix>.pstats``  the raw cProfile dump (open with ``python -m pstats``)
+- ``<prefix>.json``    a flat summary of the hottest functions, the stage
+                       timings and the memory samples, to attach to tickets
+
+Stage names: ``process_file``, ``process_compressed_file`` and ``os.remove``
+(Key File Cleaner); ``discovery``, ``read`` (frame read-ahead thread),
+``prefetch_wait``, ``decode`` (cv2.imdecode), ``clahe``, ``encode``
+(VideoWriter.write) and ``release`` (VideoWriter.release) (Video Generator).
+
+Threads started during the run (the worker pools) are profiled as well and
+merged into the same statistics, as are the stage timers and memory samples.
+"""
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+from stage_timing import StageTimer, set_active_timer
+
+
+def default_profile_prefix(tool_name):
+    """
+    Return a timestamped output prefix such as ``profile_clean_20240101_120000``.
+    """
+    return f"profile_{tool_name}_{time.strftime('%Y%m%d_%H%M%S')}"
+
+
+def _hotspots(stats, top):
+    """
+    Return the top functions by internal time as a list of dictionaries.
+    """
+    rows = []
+    for (file_name, line, function), (cc, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": function,
+            "file": file_name,
+            "line": line,
+            "ncalls": ncalls,
+            "primitive_calls": cc,
+            "tottime": tottime,
+            "cumtime": cumtime,
+        })
+    rows.sort(key=lambda row: row["tottime"], reverse=True)
+    return rows[:top]
+
+
+def _sample_memory(samples, stop, start_time, interval):
+    """
+    Record the traced memory every interval seconds until stop is set.
+    """
+    while not stop.wait(interval):
+        current, peak = tracemalloc.get_traced_memory()
+        samples.append({"t": time.perf_counter() - start_time, "current_bytes": current, "peak_bytes": peak})
+
+
+def _profile_new_threads(profilers):
+    """
+    Give every thread started from now on its own cProfile.Profile.
+
+    Before Python 3.12 cProfile only profiles the thread that enabled it.
+    threading.setprofile runs the hook in each new thread, where it enables a
+    profiler for that thread; the profilers are collected in profilers.
+    From 3.12 cProfile uses sys.monitoring, which already covers all threads.
+    """
+    if sys.version_info >= (3, 12):
+        return
+
+    def hook(frame, event, arg):
+        profiler = cProfile.Profile()
+        profilers.append(profiler)
+        profiler.enable()
+
+    threading.setprofile(hook)
+
+
+def run_profiled(func, output_prefix, *args, top=40, sample_interval=0.5, **kwargs):
+    """
+    Run func(*args, **kwargs) under cProfile, tracemalloc and the stage timers.
+
+    Parameters
+    ----------
+    func : callable
+        The tool entry point to profile.
+    output_prefix : str
+        Path prefix of the ``.pstats`` and ``.json`` outputs.
+    top : int, optional
+        Number of hotspots in the JSON summary.
+    sample_interval : float, optional
+        Seconds between tracemalloc samples.
+
+    Returns
+    -------
+    The return value of func. The profile is written even if func raises.
+    """
+    timer = StageTimer()
+    samples = []
+    stop = threading.Event()
+    profiler = cProfile.Profile()
+    thread_profilers = []
+
+    set_active_timer(timer)
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    sampler = threading.Thread(target=_sample_memory, args=(samples, stop, start_time, sample_interval), daemon=True)
+    sampler.start()
+    _profile_new_threads(thread_profilers)
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        wall_seconds = time.perf_counter() - start_time
+        stop.set()
+        sampler.join()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        set_active_timer(None)
+
+        stats = pstats.Stats(profiler)
+        for thread_profiler in thread_profilers:
+            thread_profiler.create_stats()
+            if thread_profiler.stats:
+                stats.add(thread_profiler)
+        stats.dump_stats(f"{output_prefix}.pstats")
+        summary = {
+            "entry_point": getattr(func, "__qualname__", repr(func)),
+            "wall_seconds": wall_seconds,
+            "stages": timer.as_dict(),
+            "hotspots": _hotspots(stats, top),
+            "memory": {
+                "peak_traced_bytes": peak,
+                "top_allocations": [
+                    {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:top]
+                ],
+                "samples": samples,
+            },
+        }
+        with open(f"{output_prefix}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nProfile written to {output_prefix}.pstats and {output_prefix}.json")
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """
+    Accumulate wall-clock time and call counts per named pipeline stage.
+
+    Stages are timed with ``with timer.stage("decode"): ...``. The timer is
+    cheap enough to wrap per-frame or per-file operations and may be shared
+    between worker threads.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.seconds[name] += elapsed
+                self.calls[name] += 1
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+
+    def as_dict(self):
+        """
+        Return the collected timings as a JSON-serialisable dictionary.
+        """
+        return {
+            name: {"seconds": self.seconds[name], "calls": self.calls[name]}
+            for name in self.seconds
+        }
+
+
+# Process-wide timer used when no explicit timer is passed (set while profiling)
+_active_timer = None
+
+
+def set_active_timer(timer):
+    """
+    Install ``timer`` as the process-wide default timer (None to disable).
+    """
+    global _active_timer
+    _active_timer = timer
+
+
+def timed(timer, name):
+    """
+    Return a context manager timing stage ``name`` on ``timer``.
+
+    When ``timer`` is None the active timer installed by set_active_timer is
+    used; if there is none a no-op context is returned, so callers can time
+    stages unconditionally without checking whether timing is enabled.
+    """
+    if timer is None:
+        timer = _active_timer
+    if timer is None:
+        return nullcontext()
+    return timer.stage(name)
+
+
+def stage(name):
+    """
+    Time stage ``name`` on the active timer, if any.
+    """
+    return timed(None, name)
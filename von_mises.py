@@ -0,0 +1,99 @@
+import numpy as np
+
+
+def von_mises_sigma3(sigma1, sigma2, sigma_yield, dtype=np.float64):
+    """
+    Solve the von Mises yield condition for σ₃ on a whole grid at once.
+
+    The yield condition σ₁² + σ₂² + σ₃² − σ₁σ₂ − σ₂σ₃ − σ₃σ₁ = σ_Y² is a
+    quadratic in σ₃ with roots ((σ₁ + σ₂) ± √(4σ_Y² − 3(σ₁ − σ₂)²)) / 2.
+    Both roots are computed in one broadcast pass; points where the
+    discriminant is negative (no real σ₃ on the surface) are NaN.
+
+    Parameters
+    ----------
+    sigma1, sigma2 : array_like
+        Principal stresses σ₁ and σ₂. Any shapes that broadcast together,
+        e.g. a row and a column vector instead of a full meshgrid.
+    sigma_yield : float
+        Yield stress σ_Y.
+    dtype : numpy dtype, optional
+        Floating point type of the results (default float64).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        (sigma3_pos, sigma3_neg), the larger and smaller root.
+    """
+    s1 = np.asarray(sigma1, dtype=dtype)
+    s2 = np.asarray(sigma2, dtype=dtype)
+
+    # Half of the square root of the discriminant: √(σ_Y² − ¾(σ₁ − σ₂)²)
+    root = np.asarray(s1 - s2)
+    np.multiply(root, root, out=root)
+    root *= -0.75
+    root += np.asarray(sigma_yield, dtype=root.dtype) ** 2
+    root[root < 0] = np.nan
+    np.sqrt(root, out=root)
+
+    mean = np.asarray(s1 + s2)
+    mean *= 0.5
+    sigma3_pos = mean + root
+    np.subtract(mean, root, out=mean)
+    return sigma3_pos, mean
+
+
+def von_mises_yield_surface(sigma_yield=100, num_points=100, dtype=np.float64):
+    """
+    Compute the von Mises yield surface σ₃(σ₁, σ₂) on a square grid.
+
+    The grid spans [-σ_Y, σ_Y] in both σ₁ and σ₂ (σ₁ runs from +σ_Y to
+    −σ_Y, matching plot_von_mises_yield_surface). No plotting is done, so
+    the result can be used headless.
+
+    Parameters
+    ----------
+    sigma_yield : float
+        Yield stress σ_Y.
+    num_points : int
+        Number of points per axis.
+    dtype : numpy dtype, optional
+        Floating point type of the results (default float64).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        (sigma1, sigma2, sigma3_pos, sigma3_neg), all of shape
+        (num_points, num_points). σ₃ is NaN outside the surface.
+    """
+    sigma_range = np.linspace(-sigma_yield, sigma_yield, num_points, dtype=dtype)
+    # Solve on broadcast row/column vectors, expand to full grids only for the output
+    sigma3_pos, sigma3_neg = von_mises_sigma3(-sigma_range[None, :], sigma_range[:, None], sigma_yield, dtype)
+    sigma1, sigma2 = np.meshgrid(-sigma_range, sigma_range)
+    return sigma1, sigma2, sigma3_pos, sigma3_neg
+
+
+def von_mises_plane_stress_curve(sigma_yield=100, num_points=361):
+    """
+    Closed-form von Mises yield curve for plane stress (σ₃ = 0).
+
+    σ₁² − σ₁σ₂ + σ₂² = σ_Y² is an ellipse with axes along σ₁ = ±σ₂,
+    parametrised as σ₁ = σ_Y(cos θ + sin θ/√3), σ₂ = σ_Y(cos θ − sin θ/√3).
+    No grid is needed to trace it.
+
+    Parameters
+    ----------
+    sigma_yield : float
+        Yield stress σ_Y.
+    num_points : int
+        Number of points on the closed curve; the last repeats the first.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        (sigma1, sigma2)
+    """
+    theta = np.linspace(0, 2 * np.pi, num_points)
+    cos_t = np.cos(theta)
+    sin_t = np.sin(theta) / np.sqrt(3)
+    return sigma_yield * (cos_t + sin_t), sigma_yield * (cos_t - sin_t)
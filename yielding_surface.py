@@ -3,35 +3,34 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.lines import Line2D
 
-def plot_von_mises_yield_2d(sigma_yield=100, num_points=400, sigma_range=None):
+from von_mises import von_mises_plane_stress_curve, von_mises_yield_surface
+
+def plot_von_mises_yield_2d(sigma_yield=100, num_points=400, sigma_range=None, output_path=None):
     """
     绘制二维冯·米塞斯屈服曲线（σ₁ vs σ₂），假设σ₃ = 0。
 
     参数：
     - sigma_yield: 屈服应力（例如，300 MPa）。
-    - num_points: 每个轴上的点数，用于生成网格。
+    - num_points: 屈服曲线上的采样点数。
     - sigma_range: 元组，定义应力范围，如(-sigma_max, sigma_max)。如果为None，则自动设置为1.5倍的sigma_yield。
+    - output_path: 输出图片路径（如 .png/.svg）。给定时保存图片而不显示窗口，可用于无界面的服务器。
     """
     if sigma_range is None:
         sigma_max = 1.5 * sigma_yield
     else:
         sigma_max = max(abs(sigma_range[0]), abs(sigma_range[1]))
-    sigma1 = np.linspace(-sigma_max, sigma_max, num_points)
-    sigma2 = np.linspace(-sigma_max, sigma_max, num_points)
-    S1, S2 = np.meshgrid(sigma1, sigma2)
-
-    # 计算冯·米塞斯等效应力
-    sigma_eq = np.sqrt(S1**2 - S1*S2 + S2**2)
+    # 平面应力下屈服曲线为椭圆，直接使用解析参数方程，无需生成网格
+    sigma1, sigma2 = von_mises_plane_stress_curve(sigma_yield, num_points)
 
     # 创建图形
     plt.figure(figsize=(10, 8))
 
-    # 绘制等效应力为sigma_yield的等高线
-    contour = plt.contour(S1, S2, sigma_eq, levels=[sigma_yield], colors='blue', linewidths=2)
-    plt.clabel(contour, fmt='σ_eq = σ_yield', inline=True, fontsize=12)
+    # 绘制等效应力为sigma_yield的屈服曲线
+    plt.plot(sigma1, sigma2, color='blue', linewidth=2, label='σ_eq = σ_yield')
+    plt.legend(loc='upper right', fontsize=12)
 
     # 填充屈服区域（等效应力 <= sigma_yield）
-    plt.contourf(S1, S2, sigma_eq, levels=[0, sigma_yield], colors=['lightblue'], alpha=0.5)
+    plt.fill(sigma1, sigma2, color='lightblue', alpha=0.5)
 
     # 绘制坐标轴
     plt.axhline(0, color='black', linewidth=0.5)
@@ -49,48 +48,35 @@ def plot_von_mises_yield_2d(sigma_yield=100, num_points=400, sigma_range=None):
     # 添加网格
     plt.grid(True, linestyle='--', alpha=0.5)
 
-    # 显示图形
-    plt.show()
-
+    # 显示或保存图形
+    show_or_save(output_path)
 
 
+def show_or_save(output_path=None):
+    """
+    显示当前图形；若给定 output_path，则保存到文件并关闭图形（无界面模式）。
+    """
+    if output_path is None:
+        plt.show()
+    else:
+        plt.savefig(output_path)
+        plt.close()
 
-def plot_von_mises_yield_surface(sigma_max=100, num_points=100):
-    def calculate_sigma3(sigma1, sigma2, sigma_Y):
-        # Coefficients for the quadratic equation
-        A = 2
-        B = -2 * (sigma1 + sigma2)
-        C = sigma1**2 + sigma2**2 - 2 * sigma_Y**2
-        
-        # Solve the quadratic equation: A*sigma3^2 + B*sigma3 + C = 0
-        discriminant = B**2 - 4 * A * C
-        if discriminant < 0:
-            return None, None  # No real solutions
-        else:
-            # Calculate the two possible solutions for sigma3
-            sigma3_pos = (-B + np.sqrt(discriminant)) / (2 * A)
-            sigma3_neg = (-B - np.sqrt(discriminant)) / (2 * A)
-            
-            # Return the positive solution
-            return sigma3_pos, sigma3_neg
 
-    # Define the yield stress value
-    sigma_Y = sigma_max  # Example yield stress value (in MPa or any other unit)
 
-    # Create a meshgrid for sigma1 and sigma2
-    sigma_range = np.linspace(-sigma_Y, sigma_Y, num_points)  # Range for the stresses
-    sigma1, sigma2 = np.meshgrid(-sigma_range, sigma_range)
 
-    # Calculate sigma3 for each combination of sigma1 and sigma2
-    sigma3_pos = np.zeros_like(sigma1)
-    sigma3_neg = np.zeros_like(sigma1)
+def plot_von_mises_yield_surface(sigma_max=100, num_points=100, output_path=None):
+    """
+    Plot the 3D von Mises yield surface and its projection on the σ₁-σ₂ plane.
 
-    # Loop over each pair of sigma1 and sigma2 to calculate sigma3
-    for i in range(len(sigma_range)):
-        for j in range(len(sigma_range)):
-            sigma3_pos[i, j] = calculate_sigma3(sigma1[i, j], sigma2[i, j], sigma_Y)[0]
-            sigma3_neg[i, j] = calculate_sigma3(sigma1[i, j], sigma2[i, j], sigma_Y)[1]
+    The surface is computed by von_mises_yield_surface in one vectorised
+    pass; grid points outside the surface are NaN and are left blank.
+    If output_path is given the figure is saved there instead of shown.
+    """
+    # Define the yield stress value
+    sigma_Y = sigma_max  # Example yield stress value (in MPa or any other unit)
 
+    sigma1, sigma2, sigma3_pos, sigma3_neg = von_mises_yield_surface(sigma_Y, num_points)
 
     # Create a figure with two subplots
     fig = plt.figure(figsize=(15, 6))
@@ -154,8 +140,8 @@ def plot_von_mises_yield_surface(sigma_max=100, num_points=100):
     # Adjust layout to prevent overlap
     plt.tight_layout()
 
-    # Show the plots
-    plt.show()
+    # Show or save the plots
+    show_or_save(output_path)
 
 
 